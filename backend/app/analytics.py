@@ -0,0 +1,181 @@
+# app/analytics.py
+import os
+import threading
+from datetime import datetime, timedelta
+from itertools import chain
+
+import numpy as np
+from sqlalchemy import case, extract, func, select
+from sqlalchemy.orm import Session
+
+from . import models
+from .rollups import SummaryCache
+
+REPORT_CACHE_TTL = float(os.getenv("REPORT_CACHE_TTL", "60"))  # seconds
+REPORT_FETCH_BATCH = 100_000
+PERIODS = {"7d": 7, "30d": 30, "90d": 90, "365d": 365, "all": None}
+TOP_PRODUCTS = 10
+DELAY_AFTER_HOURS = 24  # an open order older than this counts as delayed
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+SEGMENTS = [
+    # (name, min orders in the period, max orders, color)
+    ("New", 1, 1, "#0ea5e9"),
+    ("Returning", 2, 4, "#22c55e"),
+    ("Loyal", 5, None, "#f59e0b"),
+]
+INACTIVE_COLOR = "#94a3b8"
+
+# Column order of the order matrix built by load_orders
+EPOCH, USER, PRODUCT, QUANTITY, PRICE, DELIVERED, REJECTED = range(7)
+ORDER_COLUMNS = 7
+
+
+def load_orders(db: Session, since: datetime | None = None):
+    """All orders created since `since` as one float64 matrix, one row per order.
+
+    Every column is numeric in SQL (epoch seconds, ids, quantity, price and
+    0/1 flags) so rows go straight into numpy without per-row conversion,
+    fetched in batches to keep peak memory flat.
+    """
+    D = models.DeliveryRequest
+    stmt = select(
+        extract("epoch", D.created_at),
+        func.coalesce(D.user_id, -1),
+        func.coalesce(D.product_id, -1),
+        func.coalesce(D.quantity, 0),
+        func.coalesce(D.unit_price, models.Product.price, 0),
+        case((D.stage == models.DeliveryStage.delivered, 1), else_=0),
+        case((D.status == models.DeliveryStatus.rejected, 1), else_=0),
+    ).select_from(D)\
+     .outerjoin(models.Product, models.Product.id == D.product_id)\
+     .where(D.created_at.isnot(None))
+    if since is not None:
+        stmt = stmt.where(D.created_at >= since)
+
+    # Core connection, not the ORM session: plain rows without entity processing
+    result = db.connection().execute(stmt.execution_options(yield_per=REPORT_FETCH_BATCH))
+    chunks = [
+        # fromiter over the flattened rows; np.array() on Row objects is far slower
+        np.fromiter(chain.from_iterable(rows), dtype=np.float64, count=len(rows) * ORDER_COLUMNS)
+          .reshape(-1, ORDER_COLUMNS)
+        for rows in result.partitions()
+    ]
+    if not chunks:
+        return np.empty((0, ORDER_COLUMNS))
+    return np.concatenate(chunks)
+
+
+def _group_sum(keys, weights=None):
+    """Unique keys and the per-key count (or sum of weights)."""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, weights=weights, minlength=len(unique))
+
+
+def compute_report(db: Session, period: str, now: datetime | None = None):
+    """Every /reports widget for one period from a single load of the order columns."""
+    now = now or datetime.utcnow()
+    days = PERIODS[period]
+    start = now - timedelta(days=days) if days else None
+    # The previous window of the same length is loaded too, for retention
+    orders = load_orders(db, now - timedelta(days=2 * days) if days else None)
+
+    now_epoch = (now - datetime(1970, 1, 1)).total_seconds()
+    start_epoch = (start - datetime(1970, 1, 1)).total_seconds() if start else -np.inf
+    current = orders[orders[:, EPOCH] >= start_epoch]
+    previous = orders[orders[:, EPOCH] < start_epoch]
+
+    epoch = current[:, EPOCH].astype("int64").astype("datetime64[s]")
+    users = current[:, USER].astype(np.int64)
+    delivered = current[:, DELIVERED] == 1
+    rejected = current[:, REJECTED] == 1
+    succeeded = delivered & ~rejected
+    open_orders = ~delivered & ~rejected
+    revenue = current[:, QUANTITY] * current[:, PRICE]
+
+    # 📌 Summary
+    total_revenue = float(revenue[delivered].sum())
+    delivered_count = int(delivered.sum())
+    closed = int(succeeded.sum() + rejected.sum())
+    active_users, per_user = _group_sum(users[users >= 0])  # orders per customer
+    if days:
+        previous_users = np.unique(previous[:, USER].astype(np.int64))
+        retained = np.intersect1d(previous_users, active_users).size
+        retention_rate = retained / previous_users.size * 100 if previous_users.size else 0.0
+    else:
+        # No previous window: share of customers who came back for a second order
+        retention_rate = (per_user >= 2).sum() / per_user.size * 100 if per_user.size else 0.0
+    summary = {
+        "total_revenue": round(total_revenue, 2),
+        "avg_order_value": round(total_revenue / delivered_count, 2) if delivered_count else 0.0,
+        "retention_rate": round(float(retention_rate), 1),
+        "success_rate": round(float(succeeded.sum() / closed * 100), 1) if closed else 0.0,
+    }
+
+    # 📈 Monthly revenue, orders and distinct customers
+    months = epoch.astype("datetime64[M]")
+    month_keys, orders_per_month = _group_sum(months)
+    _, revenue_per_month = _group_sum(months, np.where(delivered, revenue, 0.0))
+    month_user = np.unique(np.stack([months.astype(np.int64), users]), axis=1) if len(users) else np.empty((2, 0))
+    customers_per_month = np.searchsorted(month_user[0], month_keys.astype(np.int64), side="right") - \
+        np.searchsorted(month_user[0], month_keys.astype(np.int64), side="left")
+    monthly = [
+        {"month": str(month), "revenue": round(float(rev), 2), "orders": int(count), "customers": int(customers)}
+        for month, count, rev, customers in zip(month_keys, orders_per_month, revenue_per_month, customers_per_month)
+    ]
+
+    # 🏆 Top products by delivered revenue
+    products = current[delivered, PRODUCT].astype(np.int64)
+    product_ids, sales = _group_sum(products, current[delivered, QUANTITY])
+    _, product_revenue = _group_sum(products, revenue[delivered])
+    top = np.argsort(-product_revenue, kind="stable")[:TOP_PRODUCTS]
+    names = dict(db.query(models.Product.id, models.Product.name)
+                 .filter(models.Product.id.in_([int(product_ids[i]) for i in top])).all()) if len(top) else {}
+    top_products = [
+        {"product": names.get(int(product_ids[i]), "Unknown product"),
+         "sales": int(sales[i]), "revenue": round(float(product_revenue[i]), 2)}
+        for i in top
+    ]
+
+    # 👥 Customer segments by number of orders in the period
+    total_customers = db.query(func.count(models.User.id)).filter(models.User.role == "user").scalar() or 0
+    population = max(total_customers, per_user.size)
+    segments = []
+    for name, low, high, color in SEGMENTS:
+        members = (per_user >= low) & (per_user <= high if high is not None else True)
+        share = members.sum() / population * 100 if population else 0.0
+        segments.append({"name": name, "value": round(float(share), 1), "color": color})
+    inactive = (population - per_user.size) / population * 100 if population else 0.0
+    segments.append({"name": "Inactive", "value": round(float(inactive), 1), "color": INACTIVE_COLOR})
+
+    # 🗓️ Delivered / pending / delayed by weekday of order creation
+    weekday = (epoch.astype("datetime64[D]").astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+    delayed = open_orders & (current[:, EPOCH] < now_epoch - DELAY_AFTER_HOURS * 3600)
+    pending = open_orders & ~delayed
+    by_day = {name: np.bincount(weekday[mask], minlength=7)
+              for name, mask in (("delivered", succeeded), ("pending", pending), ("delayed", delayed))}
+    weekly = [
+        {"day": WEEKDAYS[day], **{name: int(counts[day]) for name, counts in by_day.items()}}
+        for day in range(7)
+    ]
+
+    return {
+        "period": period,
+        "generated_at": now.isoformat(),
+        "summary": summary,
+        "monthly": monthly,
+        "products": top_products,
+        "segments": segments,
+        "weekly_deliveries": weekly,
+        "delayed_orders": int(delayed.sum()),
+    }
+
+
+_report_caches = {}
+_report_caches_lock = threading.Lock()
+
+
+def get_report(db: Session, period: str):
+    """The cached report for a period; widgets of the same period share one computation."""
+    with _report_caches_lock:
+        cache = _report_caches.setdefault(period, SummaryCache(ttl=REPORT_CACHE_TTL))
+    return cache.get_or_compute(lambda: compute_report(db, period))
@@ -1,4 +1,9 @@
 # app/auth.py
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from . import models, schemas
@@ -9,10 +14,39 @@ SECRET_KEY = "Fredylov614@g"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 45
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Raising BCRYPT_ROUNDS makes existing hashes "deprecated"; they are rehashed on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+HASHING_WORKERS = int(os.getenv("HASHING_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASHING_QUEUE_LIMIT = int(os.getenv("HASHING_QUEUE_LIMIT", "32"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt gets its own small pool so a login storm cannot take over the shared request threadpool
+_hashing_pool = ThreadPoolExecutor(max_workers=HASHING_WORKERS, thread_name_prefix="hashing")
+_hashing_slots = threading.BoundedSemaphore(HASHING_WORKERS + HASHING_QUEUE_LIMIT)
+
+
+def _submit_hashing(fn, *args):
+    # Fast-fail instead of queueing forever once the pool is saturated
+    if not _hashing_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    future = _hashing_pool.submit(fn, *args)
+    future.add_done_callback(lambda _: _hashing_slots.release())
+    return future
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _submit_hashing(pwd_context.hash, password).result()
+
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit_hashing(pwd_context.hash, password))
+
+async def verify_and_update_password_async(plain_password, hashed_password):
+    """Returns (verified, new_hash); new_hash is set when the stored hash uses outdated settings."""
+    return await asyncio.wrap_future(_submit_hashing(pwd_context.verify_and_update, plain_password, hashed_password))
 
 def create_user(db: Session, user: schemas.UserCreate):
     hashed_password = get_password_hash(user.password)
@@ -27,7 +61,10 @@ def create_user(db: Session, user: schemas.UserCreate):
     return db_user
 
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return _submit_hashing(pwd_context.verify, plain_password, hashed_password).result()
+
+def verify_and_update_password(plain_password, hashed_password):
+    return _submit_hashing(pwd_context.verify_and_update, plain_password, hashed_password).result()
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
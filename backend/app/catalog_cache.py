@@ -0,0 +1,113 @@
+# app/catalog_cache.py
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+CATALOG_CACHE_SIZE = 1024
+CATALOG_CACHE_TTL = 60  # seconds; bounds staleness for writes made through another worker
+
+
+class CatalogCache:
+    """Serialized GET /products responses, valid until the catalog version moves.
+
+    The version is bumped by every product write, which drops all entries at
+    once. Cached bodies carry a strong ETag so If-None-Match can be answered
+    with a 304 before any query runs.
+
+    bump() only reaches the process it runs in. Writes made through another
+    uvicorn worker, or by `python -m app.commands` in a separate process, show
+    up here (with new ETags) once entries expire after CATALOG_CACHE_TTL.
+    """
+
+    def __init__(self, maxsize=CATALOG_CACHE_SIZE, ttl=CATALOG_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = 0
+        self._entries = OrderedDict()  # key -> (body, headers, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    @staticmethod
+    def key_for(request: Request):
+        params = sorted(request.query_params.multi_items())
+        return request.url.path, tuple(params)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            body, headers, expires_at = entry
+            if expires_at < monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return body, headers
+
+    def put(self, key, version, body: bytes, headers: dict):
+        with self._lock:
+            if version != self.version:
+                return  # a write landed while this response was being built
+            self._entries[key] = (body, headers, monotonic() + self.ttl)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def respond(self, request: Request, body: bytes, headers: dict):
+        if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def cached_response(self, request: Request):
+        """The cached response for this request, or None on a miss."""
+        entry = self.get(self.key_for(request))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.respond(request, *entry)
+
+    def store_response(self, request: Request, version: int, content, extra_headers: dict | None = None):
+        """Serializes content, caches it under this request and returns the response."""
+        body = json.dumps(jsonable_encoder(content), separators=(",", ":")).encode()
+        headers = {
+            "ETag": f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            "Cache-Control": "no-cache",  # clients keep the body but revalidate with If-None-Match
+            **(extra_headers or {}),
+        }
+        self.put(self.key_for(request), version, body, headers)
+        return self.respond(request, body, headers)
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {
+            "version": self.version,
+            "entries": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+        }
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in [tag.strip() for tag in if_none_match.split(",")]
+
+
+catalog_cache = CatalogCache()
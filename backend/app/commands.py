@@ -0,0 +1,64 @@
+# app/commands.py
+"""Maintenance commands, run from the backend folder:
+
+    python -m app.commands repair-ratings
+    python -m app.commands rebuild-dashboard-stats
+    python -m app.commands rebuild-sales-cube
+"""
+import argparse
+
+from . import crud, rollups
+from .catalog_cache import CATALOG_CACHE_TTL
+from .database import Base, SessionLocal, add_missing_columns, engine
+
+
+def repair_ratings(args):
+    db = SessionLocal()
+    try:
+        repaired = crud.repair_rating_aggregates(db)
+    finally:
+        db.close()
+    print(f"✅ Rating aggregates repaired on {repaired} products")
+    # The bump in crud only clears this process's catalog cache, not a running server's
+    print(f"   Running servers serve the new ratings within {CATALOG_CACHE_TTL}s, when their cached product lists expire")
+
+
+def rebuild_dashboard_stats(args):
+    db = SessionLocal()
+    try:
+        buckets = rollups.rebuild_delivery_stats(db)
+    finally:
+        db.close()
+    print(f"✅ daily_delivery_stats rebuilt: {buckets} rows")
+
+
+def rebuild_sales_cube(args):
+    db = SessionLocal()
+    try:
+        rows = rollups.rebuild_monthly_sales(db)
+    finally:
+        db.close()
+    print(f"✅ monthly_category_sales rebuilt: {rows} rows")
+
+
+COMMANDS = {
+    "repair-ratings": (repair_ratings, "Recompute review_count, rating_sum and average_rating from product_reviews"),
+    "rebuild-dashboard-stats": (rebuild_dashboard_stats, "Recompute daily_delivery_stats from delivery_requests"),
+    "rebuild-sales-cube": (rebuild_sales_cube, "Recompute monthly_category_sales from delivered orders"),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (handler, help_text) in COMMANDS.items():
+        subparsers.add_parser(name, help=help_text).set_defaults(handler=handler)
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(Base.metadata)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
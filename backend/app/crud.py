@@ -1,24 +1,26 @@
 # app/crud.py
-from datetime import datetime
-from fastapi import HTTPException
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import case, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import NoResultFound
-from passlib.context import CryptContext
+from fastapi.concurrency import run_in_threadpool
 from . import models, schemas
-from .auth import verify_password
-import requests
+from .auth import get_password_hash, verify_and_update_password, verify_and_update_password_async
+from .catalog_cache import catalog_cache
+from .database import SessionLocal
+from .pagination import PageParams, paginate
+from .rollups import record_delivery_change
+from .tracking import publish_delivery
 from geopy.distance import geodesic
 from math import radians, sin, cos, sqrt, atan2
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 def get_user_by_email(db: Session, email: str):
     return db.query(models.User).filter(models.User.email == email).first()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = pwd_context.hash(user.password)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str | None = None):
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = models.User(
         username=user.username,
         email=user.email,
@@ -31,27 +33,64 @@ def create_user(db: Session, user: schemas.UserCreate):
     return db_user
 
 
+def save_password_hash(db: Session, user: models.User, hashed_password: str):
+    user.hashed_password = hashed_password
+    db.commit()
+
 def authenticate_user(db: Session, email: str, password: str):
     user = get_user_by_email(db, email)
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
+        return None
+    verified, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        save_password_hash(db, user, new_hash)
+    return user
+
+async def authenticate_user_async(db: Session, email: str, password: str):
+    # DB calls borrow the request threadpool briefly; bcrypt runs on the hashing pool
+    user = await run_in_threadpool(get_user_by_email, db, email)
+    if not user:
+        return None
+    verified, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        await run_in_threadpool(save_password_hash, db, user, new_hash)
     return user
 
+# Loader options
+
+# Relations each response schema serializes, loaded up front so listings run a
+# constant number of queries instead of one lazy load per row and relation
+RESPONSE_LOAD_OPTIONS = {
+    schemas.DeliveryRequestOut: lambda: (
+        selectinload(models.DeliveryRequest.product),
+        selectinload(models.DeliveryRequest.driver),
+    ),
+    schemas.CartItemOut: lambda: (
+        selectinload(models.CartItem.product),
+    ),
+}
+
+def with_response_options(query, schema):
+    options = RESPONSE_LOAD_OPTIONS.get(schema)
+    return query.options(*options()) if options else query
+
 # Products
 
 def create_product(db: Session, product: schemas.ProductCreate):
     db_product = models.Product(**product.dict())
     db.add(db_product)
     db.commit()
+    catalog_cache.bump()
     db.refresh(db_product)
     return db_product
 
 def get_product(db: Session, product_id: int):
     return db.query(models.Product).filter(models.Product.id == product_id).first()
 
-def get_products(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Product).offset(skip).limit(limit).all()
-
 def update_product(db: Session, product_id: int, updates: schemas.ProductUpdate):
     product = get_product(db, product_id)
     if not product:
@@ -59,6 +98,7 @@ def update_product(db: Session, product_id: int, updates: schemas.ProductUpdate)
     for field, value in updates.dict(exclude_unset=True).items():
         setattr(product, field, value)
     db.commit()
+    catalog_cache.bump()
     db.refresh(product)
     return product
 
@@ -68,17 +108,19 @@ def delete_product(db: Session, product_id: int):
         return None
     db.delete(product)
     db.commit()
+    catalog_cache.bump()
     return product
 
 # Deliveries
 
-def create_delivery_request(db: Session, user_id: int, request_data: schemas.DeliveryRequestCreate):
-    
-    lat, lng = get_coordinates_from_address(request_data.address)
-    warehouse_lat = 3.866
-    warehouse_lng = 11.517
-    
-        # Step 1: Get distance
+WAREHOUSE_COORDS = (3.866, 11.517)
+
+def estimate_delivery_time(lat, lng):
+    if lat is None or lng is None:
+        return None
+    warehouse_lat, warehouse_lng = WAREHOUSE_COORDS
+
+    # Step 1: Get distance
     distance_km = haversine_distance_km(warehouse_lat, warehouse_lng, lat, lng)
 
     # Step 2: Estimate time (assume average speed 30 km/h)
@@ -86,39 +128,39 @@ def create_delivery_request(db: Session, user_id: int, request_data: schemas.Del
     estimated_minutes = int((distance_km / avg_speed_kmh) * 60)
 
     # Step 3: Format as string
-    eta_string = f"{estimated_minutes} minutes"
-    
-    delivery = models.DeliveryRequest(
-        user_id=user_id,
-        product_id=request_data.product_id,
-        address=request_data.address,
-        quantity=request_data.quantity,
-        latitude=lat,
-        longitude=lng,
-        status="pending",
-        estimated_delivery_time = eta_string
-
-    )
-    db.add(delivery)
-    db.commit()
-    db.refresh(delivery)
-    return delivery
-
-def get_all_delivery_requests(db: Session):
-    return db.query(models.DeliveryRequest).all()
+    return f"{estimated_minutes} minutes"
+
+def filter_deliveries(query, start_date: date | None = None, end_date: date | None = None, status: str | None = None):
+    """Applies the admin export filters; end_date is inclusive."""
+    if start_date:
+        query = query.filter(models.DeliveryRequest.created_at >= datetime.combine(start_date, time.min))
+    if end_date:
+        query = query.filter(models.DeliveryRequest.created_at < datetime.combine(end_date + timedelta(days=1), time.min))
+    if status:
+        query = query.filter(models.DeliveryRequest.status == status)
+    return query
+
+def get_all_delivery_requests(db: Session, page: PageParams):
+    query = with_response_options(db.query(models.DeliveryRequest), schemas.DeliveryRequestOut)
+    return paginate(query, (models.DeliveryRequest.id,), page, descending=True)
 
 def update_delivery_status(db: Session, delivery_id: int, status: str):
     delivery = db.query(models.DeliveryRequest).filter(models.DeliveryRequest.id == delivery_id).first()
     if delivery:
+        old = (delivery.status, delivery.stage)
         delivery.status = status
+        record_delivery_change(db, delivery, old, (delivery.status, delivery.stage))
         db.commit()
+        publish_delivery(delivery)
     return delivery
 
 def update_delivery_stage(db: Session, delivery_id: int, data: schemas.DeliveryTrackingUpdate):
     delivery = db.query(models.DeliveryRequest).filter(models.DeliveryRequest.id == delivery_id).first()
     if not delivery:
         return None
+    old = (delivery.status, delivery.stage)
     delivery.stage = data.stage
+    record_delivery_change(db, delivery, old, (delivery.status, delivery.stage))
     if data.driver_name:
         delivery.driver_name = data.driver_name
     if data.driver_phone:
@@ -127,35 +169,41 @@ def update_delivery_stage(db: Session, delivery_id: int, data: schemas.DeliveryT
         delivery.driver_vehicle = data.driver_vehicle
     db.commit()
     db.refresh(delivery)
+    publish_delivery(delivery)
     return delivery
 
-def get_user_delivery_tracking(db: Session, user_id: int):
-    return db.query(models.DeliveryRequest).filter(models.DeliveryRequest.user_id == user_id).all()
+ASSIGN_CHUNK_SIZE = 10000  # stays under SQLite's bound-parameter limit
 
+def assign_driver_bulk(db: Session, driver_id: int, delivery_ids):
+    """Locks and assigns every still-unlocked delivery in one conditional UPDATE per chunk.
 
-def get_coordinates_from_address(address: str):
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {
-        'q': f"{address}, Cameroon",
-        'format': 'json',
-        'limit': 1
-    }
-    headers = {
-        "User-Agent": "aquaflow-app/1.0"
-    }
+    The is_locked check lives in the UPDATE itself, so two admins racing on
+    the same deliveries cannot both claim one. Returns (assigned, skipped).
+    """
+    ids = list(dict.fromkeys(delivery_ids))
+    delivery = models.DeliveryRequest
+    values = {"driver_id": driver_id, "is_locked": True, "updated_at": datetime.utcnow()}
+    assigned = []
     try:
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        results = response.json()
-        print("Response: ", results)
-        
-        if results:
-            return float(results[0]['lat']), float(results[0]['lon'])
-        
-    except Exception as e:
-            print("❌ Failed to get coordinates:", str(e))
-            
-    return None, None
+        for i in range(0, len(ids), ASSIGN_CHUNK_SIZE):
+            chunk = ids[i:i + ASSIGN_CHUNK_SIZE]
+            condition = delivery.id.in_(chunk) & (delivery.is_locked == False)
+            if db.get_bind().dialect.update_returning:
+                result = db.execute(update(delivery).where(condition).values(**values).returning(delivery.id))
+                assigned.extend(row[0] for row in result)
+            else:
+                # No RETURNING: lock the candidate rows first, then update exactly those
+                candidates = [row[0] for row in db.query(delivery.id).filter(condition).with_for_update()]
+                if candidates:
+                    db.execute(update(delivery).where(delivery.id.in_(candidates)).values(**values))
+                assigned.extend(candidates)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    done = set(assigned)
+    return assigned, [delivery_id for delivery_id in ids if delivery_id not in done]
 
 def compute_distance(p1, p2):
     return geodesic(p1, p2).kilometers
@@ -178,6 +226,7 @@ def haversine_distance_km(lat1, lon1, lat2, lon2):
     return R * c  # Distance in KM
 
 
+# Reference implementation; benchmarks.route_solver compares it with app.routing.optimize_route
 def optimize_delivery_route(deliveries, start=(4.0749865, 11.5525917)):  # HQ in Yaoundé
     route = []
     remaining = deliveries.copy()
@@ -196,6 +245,17 @@ def optimize_delivery_route(deliveries, start=(4.0749865, 11.5525917)):  # HQ in
 # Review
 
 
+def _apply_rating_change(db: Session, product_id: int, count_delta: int, sum_delta: int):
+    # Computed from the row's current values inside the UPDATE, so concurrent reviews can't lose updates
+    product = models.Product
+    new_count = product.review_count + count_delta
+    new_sum = product.rating_sum + sum_delta
+    db.query(product).filter(product.id == product_id).update({
+        product.review_count: new_count,
+        product.rating_sum: new_sum,
+        product.average_rating: case((new_count > 0, new_sum * 1.0 / new_count), else_=0.0),
+    }, synchronize_session=False)
+
 def create_or_update_review(db: Session, user_id: int, review_data: schemas.ReviewCreate):
     existing = db.query(models.ProductReview).filter_by(
         user_id=user_id,
@@ -203,10 +263,12 @@ def create_or_update_review(db: Session, user_id: int, review_data: schemas.Revi
     ).first()
 
     if existing:
+        _apply_rating_change(db, review_data.product_id, 0, review_data.rating - existing.rating)
         existing.rating = review_data.rating
         existing.comment = review_data.comment
         existing.updated_at = datetime.utcnow()
         db.commit()
+        catalog_cache.bump()
         db.refresh(existing)
         return existing
     else:
@@ -217,15 +279,59 @@ def create_or_update_review(db: Session, user_id: int, review_data: schemas.Revi
             comment=review_data.comment,
         )
         db.add(new_review)
+        _apply_rating_change(db, review_data.product_id, 1, review_data.rating)
         db.commit()
+        catalog_cache.bump()
         db.refresh(new_review)
         return new_review
 
-def get_reviews_by_product(db: Session, product_id: int):
-    return db.query(models.ProductReview).filter_by(product_id=product_id).all()
+def repair_rating_aggregates(db: Session, product_ids=None):
+    """Recomputes review_count/rating_sum/average_rating from product_reviews."""
+    totals = db.query(
+        models.ProductReview.product_id,
+        func.count(models.ProductReview.id),
+        func.coalesce(func.sum(models.ProductReview.rating), 0),
+    ).group_by(models.ProductReview.product_id)
+    products = db.query(models.Product)
+    if product_ids is not None:
+        totals = totals.filter(models.ProductReview.product_id.in_(product_ids))
+        products = products.filter(models.Product.id.in_(product_ids))
+    totals = {product_id: (count, total) for product_id, count, total in totals}
+
+    repaired = 0
+    for product in products:
+        count, total = totals.get(product.id, (0, 0))
+        average = total / count if count else 0.0
+        if (product.review_count, product.rating_sum, product.average_rating) != (count, total, average):
+            product.review_count, product.rating_sum, product.average_rating = count, total, average
+            repaired += 1
+    db.commit()
+    catalog_cache.bump()
+    return repaired
+
+def ensure_rating_aggregates():
+    """Backfills the aggregates on first start, when reviews predate the columns.
+
+    add_missing_columns() adds them as 0, so a reviewed product with a zero
+    review_count means they were never filled in.
+    """
+    db = SessionLocal()
+    try:
+        stale = db.query(models.ProductReview.id)\
+            .join(models.Product, models.Product.id == models.ProductReview.product_id)\
+            .filter(or_(models.Product.review_count == 0, models.Product.review_count.is_(None)))\
+            .first()
+        if stale is not None:
+            repair_rating_aggregates(db)
+    finally:
+        db.close()
+
+def get_reviews_by_product(db: Session, product_id: int, page: PageParams):
+    query = db.query(models.ProductReview).filter_by(product_id=product_id)
+    return paginate(query, (models.ProductReview.id,), page, descending=True)
 
 def get_average_rating(db: Session, product_id: int) -> float:
-    result = db.query(func.avg(models.ProductReview.rating)).filter_by(product_id=product_id).scalar()
+    result = db.query(models.Product.average_rating).filter(models.Product.id == product_id).scalar()
     return round(result or 0.0, 2)
 
 # Bookmarks
@@ -262,11 +368,11 @@ def remove_bookmark(db: Session, user_id: int, product_id: int):
     return False
 
 # ✅ List user’s bookmarks
-def get_user_bookmarks(db: Session, user_id: int):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if user:
-        return user.bookmarks
-    return []
+def get_user_bookmarks(db: Session, user_id: int, page: PageParams):
+    query = db.query(models.Product)\
+        .join(models.user_bookmarks, models.user_bookmarks.c.product_id == models.Product.id)\
+        .filter(models.user_bookmarks.c.user_id == user_id)
+    return paginate(query, (models.Product.id,), page)
 
 # Notifications
 
@@ -277,11 +383,19 @@ def create_notification(db: Session, user_id: int, message: str):
     db.refresh(notification)
     return notification
 
-def get_user_notifications(db: Session, user_id: int):
-    return db.query(models.Notification)\
-        .filter(models.Notification.user_id == user_id)\
-             .order_by(models.Notification.created_at.desc())\
-             .all()
+def notify_active_users(db: Session, message: str):
+    """Broadcast as a single INSERT ... SELECT, so no user rows are loaded into Python."""
+    users = select(
+        models.User.id,
+        literal(message),
+        literal(False),
+        literal(datetime.utcnow()),
+    ).where(models.User.is_active == True)
+    result = db.execute(
+        insert(models.Notification).from_select(["user_id", "message", "is_read", "created_at"], users)
+    )
+    db.commit()
+    return result.rowcount
 
 def mark_all_as_read(db: Session, user_id: int):
     db.query(models.Notification)\
@@ -299,8 +413,12 @@ def create_user_message(db: Session, user_id: int, data: schemas.MessageCreate):
     db.refresh(msg)
     return msg
 
-def get_all_messages(db: Session):
-    return db.query(models.Message).order_by(models.Message.created_at.desc()).all()
+def get_all_messages(db: Session, page: PageParams):
+    return paginate(db.query(models.Message), (models.Message.created_at, models.Message.id), page, descending=True)
+
+def get_user_messages(db: Session, user_id: int, page: PageParams):
+    query = db.query(models.Message).filter(models.Message.user_id == user_id)
+    return paginate(query, (models.Message.created_at, models.Message.id), page, descending=True)
 
 def respond_to_message(db: Session, message_id: int, response: str):
     msg = db.query(models.Message).filter(models.Message.id == message_id).first()
@@ -317,27 +435,6 @@ def respond_to_message(db: Session, message_id: int, response: str):
 
 # Cart
 
-def add_to_cart(db, user_id: int, item: schemas.CartItemCreate):
-    # Check if the product exists
-    product = db.query(models.Product).filter(models.Product.id == item.product_id).first()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-
-    # Check if the user already has this product in cart
-    existing = db.query(models.CartItem).filter_by(user_id=user_id, product_id=item.product_id).first()
-    if existing:
-        existing.quantity += item.quantity
-    else:
-        new_item = models.CartItem(user_id=user_id, product_id=item.product_id, quantity=item.quantity)
-        db.add(new_item)
-
-    db.commit()
-
-
-def get_cart_items(db, user_id: int):
-    return db.query(models.CartItem).filter_by(user_id=user_id).all()
-
-
 def remove_cart_item(db, user_id: int, product_id: int):
     item = db.query(models.CartItem).filter_by(user_id=user_id, product_id=product_id).first()
     if item:
@@ -0,0 +1,112 @@
+# app/crud_async.py
+"""AsyncSession versions of the hot CRUD paths.
+
+These replace their sync namesakes, which have been removed from crud.py;
+the remaining routes move over one at a time and both modules share the
+same database meanwhile.
+"""
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schemas
+from .crud import estimate_delivery_time, with_response_options
+from .geocoding import GEOCODING_MODE, geocode_cache
+from .pagination import PageParams, paginate_async
+from .rollups import record_delivery_change
+from .search import apply_product_search
+
+# Products
+
+async def get_products(db: AsyncSession, page: PageParams, category: str | None = None,
+                       is_popular: bool | None = None, min_price: float | None = None,
+                       max_price: float | None = None, search: str | None = None, sort: str | None = None):
+    stmt = select(models.Product)
+
+    if category:
+        stmt = stmt.where(models.Product.category == category)
+
+    if is_popular is not None:
+        stmt = stmt.where(models.Product.isPopular == is_popular)
+
+    if min_price is not None:
+        stmt = stmt.where(models.Product.price >= min_price)
+
+    if max_price is not None:
+        stmt = stmt.where(models.Product.price <= max_price)
+
+    if search:
+        # Relevance-ordered top matches for type-ahead; search results are not cursor-paged
+        stmt = apply_product_search(stmt, search, db.bind.dialect.name)
+        return list((await db.execute(stmt.limit(page.limit))).scalars().all())
+    if sort == "rating":
+        return await paginate_async(db, stmt, (models.Product.average_rating, models.Product.id), page, descending=True)
+    return await paginate_async(db, stmt, (models.Product.id,), page)
+
+# Cart
+
+async def add_to_cart(db: AsyncSession, user_id: int, item: schemas.CartItemCreate):
+    if await db.get(models.Product, item.product_id) is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    existing = (await db.execute(
+        select(models.CartItem).where(models.CartItem.user_id == user_id, models.CartItem.product_id == item.product_id)
+    )).scalars().first()
+    if existing:
+        existing.quantity += item.quantity
+    else:
+        db.add(models.CartItem(user_id=user_id, product_id=item.product_id, quantity=item.quantity))
+
+    await db.commit()
+
+async def get_cart_items(db: AsyncSession, user_id: int, page: PageParams):
+    stmt = with_response_options(select(models.CartItem).where(models.CartItem.user_id == user_id), schemas.CartItemOut)
+    return await paginate_async(db, stmt, (models.CartItem.id,), page)
+
+# Notifications
+
+async def get_user_notifications(db: AsyncSession, user_id: int, page: PageParams):
+    stmt = select(models.Notification).where(models.Notification.user_id == user_id)
+    return await paginate_async(db, stmt, (models.Notification.created_at, models.Notification.id), page, descending=True)
+
+# Deliveries
+
+async def get_user_delivery_tracking(db: AsyncSession, user_id: int, page: PageParams):
+    stmt = select(models.DeliveryRequest).where(models.DeliveryRequest.user_id == user_id)
+    stmt = with_response_options(stmt, schemas.DeliveryRequestOut)
+    return await paginate_async(db, stmt, (models.DeliveryRequest.id,), page, descending=True)
+
+async def create_delivery_request(db: AsyncSession, user_id: int, request_data: schemas.DeliveryRequestCreate):
+    deferred = GEOCODING_MODE == "deferred"
+    if deferred:
+        # Only a cache hit is resolved inline; everything else goes to the worker
+        _, coords = await geocode_cache.get_async(request_data.address)
+    else:
+        # Awaiting Nominatim holds no thread, only this request
+        coords = await geocode_cache.lookup_async(request_data.address)
+    lat, lng = coords or (None, None)
+
+    delivery = models.DeliveryRequest(
+        user_id=user_id,
+        product_id=request_data.product_id,
+        address=request_data.address,
+        quantity=request_data.quantity,
+        latitude=lat,
+        longitude=lng,
+        status="pending",
+        estimated_delivery_time=estimate_delivery_time(lat, lng)
+    )
+    db.add(delivery)
+    await db.flush()
+    # The rollup bookkeeping is sync code; run_sync executes it on this session's connection
+    await db.run_sync(lambda session: record_delivery_change(session, delivery, new=(delivery.status, delivery.stage)))
+    await db.commit()
+
+    stmt = with_response_options(select(models.DeliveryRequest).where(models.DeliveryRequest.id == delivery.id),
+                                 schemas.DeliveryRequestOut)
+    delivery = (await db.execute(stmt.execution_options(populate_existing=True))).scalars().one()
+
+    if deferred and lat is None:
+        from .geocoding_worker import geocoding_worker
+        geocoding_worker.enqueue(delivery.id)
+    return delivery
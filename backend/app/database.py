@@ -1,18 +1,144 @@
 # app/database.py
+import os
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.pool import QueuePool
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./eden.db")
+
+# Postgres profile
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds; below typical server idle timeouts
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# SQLite profile
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # safe with WAL, fsyncs only at checkpoints
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        # WAL lets readers run alongside the single writer instead of failing with "database is locked"
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+def _normalize_url(url: str) -> str:
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]  # scheme used by Heroku/Render
+    return url
+
+
+def _is_file_sqlite(url: str) -> bool:
+    return ":memory:" not in url and url.split("///", 1)[-1] not in ("", url)
+
+
+def _pool_options():
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,  # drop connections the server closed while idle
+    }
+
 
-DATABASE_URL = "sqlite:///./eden.db"  # You can switch to PostgreSQL later
+def _missing_driver(url: str, error: ModuleNotFoundError):
+    scheme = url.split("://", 1)[0]
+    return RuntimeError(
+        f"DATABASE_URL uses {scheme}, which needs the '{error.name}' package; "
+        f"install it with pip install -r requirements.txt"
+    )
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+def build_engine(url: str = DATABASE_URL):
+    """Engine for the given URL with the profile that suits its backend."""
+    url = _normalize_url(url)
+    if url.startswith("sqlite"):
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        if _is_file_sqlite(url):
+            event.listen(engine, "connect", _sqlite_pragmas)
+        return engine
+
+    try:
+        return create_engine(url, poolclass=QueuePool, **_pool_options())
+    except ModuleNotFoundError as e:
+        raise _missing_driver(url, e) from e
+
+
+def async_url(url: str = DATABASE_URL) -> str:
+    """The asyncio driver flavour of a sync database URL."""
+    url = _normalize_url(url)
+    scheme, rest = url.split("://", 1)
+    driver = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}.get(scheme.split("+")[0])
+    return f"{driver}://{rest}" if driver else url
+
+
+def build_async_engine(url: str = DATABASE_URL):
+    """Async counterpart of build_engine, same profile on the same database."""
+    url = async_url(url)
+    if url.startswith("sqlite"):
+        engine = create_async_engine(url)
+        if _is_file_sqlite(url):
+            event.listen(engine.sync_engine, "connect", _sqlite_pragmas)
+        return engine
+    try:
+        return create_async_engine(url, **_pool_options())
+    except ModuleNotFoundError as e:
+        raise _missing_driver(url, e) from e
+
+
+engine = build_engine()
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
+# Async sessions for routes that await the database instead of holding a
+# threadpool thread; both paths share the same database during the migration
+async_engine = build_async_engine()
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# create_all() never touches existing tables, so columns and indexes added to
+# a model later are appended here. Nullable/defaulted columns only.
+def add_missing_columns(metadata):
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            present = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in present:
+                    continue
+                ddl = f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {column.type.compile(engine.dialect)}'
+                default = column.default.arg if column.default is not None and column.default.is_scalar else None
+                if default is not None:
+                    ddl += f" DEFAULT {int(default) if isinstance(default, bool) else repr(default)}"
+                conn.execute(text(ddl))
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
@@ -1,7 +1,13 @@
 # app/dependencies.py
+import os
+import threading
+from collections import OrderedDict
+from time import monotonic
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from .auth import SECRET_KEY, ALGORITHM
 from .schemas import TokenData
@@ -10,24 +16,118 @@ from app import models
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
-    credentials_exception = HTTPException(
+# Per worker process: invalidate_principal() only reaches the worker that made the change,
+# so on the others a deactivated or demoted user keeps access for at most this long
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "5"))  # seconds
+PRINCIPAL_CACHE_SIZE = 10000
+
+_USER_COLUMNS = [c.key for c in models.User.__table__.columns]
+
+
+class PrincipalCache:
+    """Token subject (email) -> user column values, so hot endpoints skip the users lookup.
+
+    The cache lives in each worker process. Changes made through the API are
+    invalidated immediately in the worker that served them; other workers see
+    them once their entry expires, PRINCIPAL_CACHE_TTL seconds at most. Set
+    the TTL to 0 to disable caching where that window is not acceptable.
+    """
+
+    def __init__(self, ttl=PRINCIPAL_CACHE_TTL, maxsize=PRINCIPAL_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, subject: str):
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            values, expires_at = entry
+            if expires_at < monotonic():
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+        # A fresh detached instance per request, never shared between sessions
+        return models.User(**values)
+
+    def put(self, subject: str, user: models.User):
+        if self.ttl <= 0:
+            return
+        values = {key: getattr(user, key) for key in _USER_COLUMNS}
+        with self._lock:
+            self._entries[subject] = (values, monotonic() + self.ttl)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            self._entries.pop(subject, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+def invalidate_principal(email: str):
+    """Call after changing or deleting a user so the change applies on their next request.
+
+    Only this process's cache is cleared; see PrincipalCache for the cross-worker bound.
+    """
+    principal_cache.invalidate(email)
+
+
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid token or credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _token_subject(token: str) -> str:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
-            raise credentials_exception
+            raise _credentials_exception()
         token_data = TokenData(email=email)
     except JWTError:
-        raise credentials_exception
-    
-    user = db.query(models.User).filter(models.User.email == token_data.email).first()
+        raise _credentials_exception()
+    return token_data.email
+
+
+def get_user_from_token(token: str, db: Session):
+    email = _token_subject(token)
+    user = principal_cache.get(email)
+    if user is not None:
+        return user
+
+    user = db.query(models.User).filter(models.User.email == email).first()
+    if user is None:
+        raise _credentials_exception()
+    principal_cache.put(email, user)
+    return user
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(database.get_db)):
+    return get_user_from_token(token, db)
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(database.get_async_db)):
+    """get_current_user for async routes; a cache miss awaits the users lookup."""
+    email = _token_subject(token)
+    user = principal_cache.get(email)
+    if user is not None:
+        return user
+
+    user = (await db.execute(select(models.User).where(models.User.email == email))).scalars().first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    principal_cache.put(email, user)
     return user
 
 def get_current_admin_user(
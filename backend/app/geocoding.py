@@ -0,0 +1,291 @@
+# app/geocoding.py
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from time import monotonic
+
+import httpx
+import requests
+
+from . import models
+from .database import AsyncSessionLocal, SessionLocal
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_HEADERS = {"User-Agent": "aquaflow-app/1.0"}
+
+GEOCODE_CACHE_SIZE = 2048
+GEOCODE_TTL = timedelta(days=30)           # found addresses barely move
+GEOCODE_NEGATIVE_TTL = timedelta(hours=6)  # retry unknown addresses a few times a day
+
+# "inline" geocodes inside POST /delivery/, "deferred" hands it to the background worker
+GEOCODING_MODE = os.getenv("GEOCODING_MODE", "inline")
+
+
+class GeocodingError(Exception):
+    """The geocoder could not be reached; the address may still be valid."""
+
+
+def normalize_address(address: str) -> str:
+    key = address.strip().lower()
+    key = re.sub(r"[\s,;.]+", " ", key).strip()
+    # Every lookup is scoped to Cameroon already, so drop it from the key
+    key = re.sub(r"\s*\b(cameroon|cameroun)$", "", key).strip()
+    return key
+
+
+def _nominatim_params(address: str):
+    return {
+        'q': f"{address}, Cameroon",
+        'format': 'json',
+        'limit': 1
+    }
+
+
+def _first_result(results):
+    if results:
+        return float(results[0]['lat']), float(results[0]['lon'])
+    return None
+
+
+def fetch_coordinates_from_nominatim(address: str):
+    """Returns (lat, lng), or None when Nominatim has no match. Raises GeocodingError on network failure."""
+    try:
+        response = requests.get(NOMINATIM_URL, params=_nominatim_params(address), headers=NOMINATIM_HEADERS, timeout=10)
+        response.raise_for_status()
+        results = response.json()
+    except Exception as e:
+        print("❌ Failed to get coordinates:", str(e))
+        raise GeocodingError(str(e)) from e
+    return _first_result(results)
+
+
+_async_client = None
+
+
+def _get_async_client():
+    # One pooled client for the app's event loop, created on first use
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(headers=NOMINATIM_HEADERS, timeout=10)
+    return _async_client
+
+
+async def close_async_client():
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def fetch_coordinates_from_nominatim_async(address: str):
+    """fetch_coordinates_from_nominatim without blocking a thread while Nominatim answers."""
+    try:
+        response = await _get_async_client().get(NOMINATIM_URL, params=_nominatim_params(address))
+        response.raise_for_status()
+        results = response.json()
+    except Exception as e:
+        print("❌ Failed to get coordinates:", str(e))
+        raise GeocodingError(str(e)) from e
+    return _first_result(results)
+
+
+class GeocodeCache:
+    """Two tier address -> coordinates cache: in-memory LRU in front of the geocode_cache table."""
+
+    def __init__(self, maxsize=GEOCODE_CACHE_SIZE, ttl=GEOCODE_TTL,
+                 negative_ttl=GEOCODE_NEGATIVE_TTL, session_factory=SessionLocal,
+                 fetch=fetch_coordinates_from_nominatim, async_session_factory=AsyncSessionLocal,
+                 fetch_async=fetch_coordinates_from_nominatim_async):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.session_factory = session_factory
+        # Swap these for a local stand-in geocoder in tests. fetch_async is the one
+        # POST /delivery/ awaits inline; fetch is only used by the geocoding worker thread.
+        self.fetch = fetch
+        self.async_session_factory = async_session_factory
+        self.fetch_async = fetch_async
+        self._entries = OrderedDict()  # key -> (coords or None, expires_at monotonic)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.errors = 0
+
+    # Memory tier
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            coords, expires_at = entry
+            if expires_at < monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, coords
+
+    def _put_memory(self, key, coords, ttl: timedelta):
+        with self._lock:
+            self._entries[key] = (coords, monotonic() + ttl.total_seconds())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    # Database tier
+
+    def _read_row(self, row):
+        if row is None:
+            return False, None, None
+        ttl = self.ttl if row.found else self.negative_ttl
+        remaining = row.updated_at + ttl - datetime.utcnow()
+        if remaining <= timedelta(0):
+            return False, None, None
+        coords = (row.latitude, row.longitude) if row.found else None
+        return True, coords, remaining
+
+    @staticmethod
+    def _write_row(row, key, coords):
+        if row is None:
+            row = models.GeocodeCacheEntry(address_key=key)
+        row.found = coords is not None
+        row.latitude, row.longitude = coords if coords else (None, None)
+        row.updated_at = datetime.utcnow()
+        return row
+
+    def _get_db(self, key):
+        db = self.session_factory()
+        try:
+            return self._read_row(db.get(models.GeocodeCacheEntry, key))
+        finally:
+            db.close()
+
+    def _put_db(self, key, coords):
+        db = self.session_factory()
+        try:
+            db.add(self._write_row(db.get(models.GeocodeCacheEntry, key), key, coords))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print("❌ Failed to persist geocode cache entry:", str(e))
+        finally:
+            db.close()
+
+    async def _get_db_async(self, key):
+        async with self.async_session_factory() as db:
+            return self._read_row(await db.get(models.GeocodeCacheEntry, key))
+
+    async def _put_db_async(self, key, coords):
+        async with self.async_session_factory() as db:
+            try:
+                db.add(self._write_row(await db.get(models.GeocodeCacheEntry, key), key, coords))
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                print("❌ Failed to persist geocode cache entry:", str(e))
+
+    # Public API
+
+    def _count(self, *counters):
+        # Shared by the threadpool, the event loop and the geocoding worker thread
+        with self._lock:
+            for name in counters:
+                setattr(self, name, getattr(self, name) + 1)
+
+    def _memory_hit(self, key):
+        found, coords = self._get_memory(key)
+        if found:
+            self._count("hits", *(["negative_hits"] if coords is None else []))
+        return found, coords
+
+    def _db_hit(self, key, found, coords, remaining):
+        if found:
+            self._count("db_hits", *(["negative_hits"] if coords is None else []))
+            self._put_memory(key, coords, remaining)
+        return found, coords
+
+    def get(self, address: str):
+        """Returns (cached, coords). coords is None for a cached negative result."""
+        key = normalize_address(address)
+        found, coords = self._memory_hit(key)
+        if found:
+            return True, coords
+        return self._db_hit(key, *self._get_db(key))
+
+    async def get_async(self, address: str):
+        key = normalize_address(address)
+        found, coords = self._memory_hit(key)
+        if found:
+            return True, coords
+        return self._db_hit(key, *await self._get_db_async(key))
+
+    def put(self, address: str, coords):
+        key = normalize_address(address)
+        self._put_memory(key, coords, self.ttl if coords else self.negative_ttl)
+        self._put_db(key, coords)
+
+    def lookup(self, address: str, fetch=None, raise_errors=False):
+        """Cached geocode. Network failures are not cached, only definite misses."""
+        cached, coords = self.get(address)
+        if cached:
+            return coords
+
+        self._count("misses")
+        try:
+            coords = (fetch or self.fetch)(address)
+        except GeocodingError:
+            self._count("errors")
+            if raise_errors:
+                raise
+            return None
+        self.put(address, coords)
+        return coords
+
+    async def put_async(self, address: str, coords):
+        key = normalize_address(address)
+        self._put_memory(key, coords, self.ttl if coords else self.negative_ttl)
+        await self._put_db_async(key, coords)
+
+    async def lookup_async(self, address: str, fetch=None, raise_errors=False):
+        """lookup() for async routes: cache tiers and the geocoder are awaited."""
+        cached, coords = await self.get_async(address)
+        if cached:
+            return coords
+
+        self._count("misses")
+        try:
+            coords = await (fetch or self.fetch_async)(address)
+        except GeocodingError:
+            self._count("errors")
+            if raise_errors:
+                raise
+            return None
+        await self.put_async(address, coords)
+        return coords
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            size = len(self._entries)
+            hits, db_hits, misses = self.hits, self.db_hits, self.misses
+            negative_hits, errors = self.negative_hits, self.errors
+        lookups = hits + db_hits + misses
+        return {
+            "memory_entries": size,
+            "memory_hits": hits,
+            "db_hits": db_hits,
+            "misses": misses,
+            "negative_hits": negative_hits,
+            "errors": errors,
+            "hit_rate": round((hits + db_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+geocode_cache = GeocodeCache()
@@ -0,0 +1,184 @@
+# app/geocoding_worker.py
+import heapq
+import itertools
+import threading
+from time import monotonic, sleep
+
+from . import crud, models
+from .database import SessionLocal
+from .geocoding import GeocodingError, geocode_cache
+from .tracking import publish_delivery
+
+NOMINATIM_RATE_PER_SECOND = 1.0  # Nominatim usage policy: at most 1 request per second
+MAX_ATTEMPTS = 5
+BASE_BACKOFF_SECONDS = 2.0
+MAX_BACKOFF_SECONDS = 300.0
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available."""
+        while True:
+            with self._lock:
+                now = monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            sleep(wait)
+
+
+class GeocodingWorker:
+    """Background thread that fills in coordinates and ETA for deliveries saved without them."""
+
+    def __init__(self, cache=geocode_cache, rate=NOMINATIM_RATE_PER_SECOND, max_attempts=MAX_ATTEMPTS,
+                 base_backoff=BASE_BACKOFF_SECONDS, session_factory=SessionLocal):
+        self.cache = cache
+        self.bucket = TokenBucket(rate)
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.session_factory = session_factory
+        self._queue = []  # heap of (ready_at, seq, delivery_id, attempt)
+        self._queued = set()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self.resolved = 0
+        self.unresolved = 0
+        self.retries = 0
+
+    def enqueue(self, delivery_id: int, attempt: int = 0, delay: float = 0.0):
+        with self._cond:
+            if attempt == 0 and delivery_id in self._queued:
+                return
+            self._queued.add(delivery_id)
+            heapq.heappush(self._queue, (monotonic() + delay, next(self._seq), delivery_id, attempt))
+            self._cond.notify()
+
+    def enqueue_pending(self):
+        """Requeues rows left without coordinates, e.g. by a restart."""
+        db = self.session_factory()
+        try:
+            rows = db.query(models.DeliveryRequest.id)\
+                .filter(models.DeliveryRequest.latitude.is_(None))\
+                .filter(models.DeliveryRequest.status == "pending")\
+                .all()
+        finally:
+            db.close()
+        for (delivery_id,) in rows:
+            self.enqueue(delivery_id)
+        return len(rows)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="geocoding-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._queue)
+
+    def _next(self):
+        with self._cond:
+            while self._running:
+                if self._queue:
+                    wait = self._queue[0][0] - monotonic()
+                    if wait <= 0:
+                        _, _, delivery_id, attempt = heapq.heappop(self._queue)
+                        self._queued.discard(delivery_id)
+                        return delivery_id, attempt
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+            return None
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            try:
+                self.process(*item)
+            except Exception as e:
+                print("❌ Geocoding worker failed:", str(e))
+
+    def _load(self, db, delivery_id: int):
+        delivery = db.query(models.DeliveryRequest).filter(models.DeliveryRequest.id == delivery_id).first()
+        if not delivery or delivery.latitude is not None:
+            return None
+        return delivery
+
+    def process(self, delivery_id: int, attempt: int = 0):
+        # Short session for the read: none is held through the rate-limit wait or the Nominatim call
+        db = self.session_factory()
+        try:
+            delivery = self._load(db, delivery_id)
+            address = delivery.address if delivery else None
+        finally:
+            db.close()
+        if address is None:
+            return
+
+        # Cache hits are free; only real geocoder calls spend a token
+        cached, coords = self.cache.get(address)
+        if not cached:
+            self.bucket.acquire()
+            try:
+                coords = self.cache.lookup(address, raise_errors=True)
+            except GeocodingError:
+                if attempt + 1 < self.max_attempts:
+                    self.retries += 1
+                    delay = min(self.base_backoff * 2 ** attempt, MAX_BACKOFF_SECONDS)
+                    self.enqueue(delivery_id, attempt + 1, delay)
+                else:
+                    self.unresolved += 1
+                return
+
+        if coords is None:
+            self.unresolved += 1
+            return
+
+        db = self.session_factory()
+        try:
+            # Re-read: the delivery may have been deleted or located while we waited
+            delivery = self._load(db, delivery_id)
+            if delivery is None:
+                return
+            delivery.latitude, delivery.longitude = coords
+            delivery.estimated_delivery_time = crud.estimate_delivery_time(*coords)
+            db.commit()
+            publish_delivery(delivery)
+            self.resolved += 1
+        finally:
+            db.close()
+
+    def stats(self):
+        return {
+            "queued": self.pending(),
+            "resolved": self.resolved,
+            "unresolved": self.unresolved,
+            "retries": self.retries,
+        }
+
+
+geocoding_worker = GeocodingWorker()
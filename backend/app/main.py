@@ -1,17 +1,37 @@
 # app/main.py
+import asyncio
 from fastapi import FastAPI, Depends, HTTPException
+from fastapi.responses import Response
 from sqlalchemy.orm import Session
 from . import models, schemas, crud
-from .database import engine, SessionLocal, Base
+from .database import engine, async_engine, SessionLocal, Base, add_missing_columns
 from fastapi.security import OAuth2PasswordRequestForm
-from .auth import create_access_token
+from .auth import create_access_token, get_password_hash_async
+from fastapi.concurrency import run_in_threadpool
 from .schemas import Token
-from app.routes import user, product, delivery, reviews, bookmarks, notifications, messages, dashboard, driver, admin, cart, reports
+from app.routes import user, product, delivery, reviews, bookmarks, notifications, messages, dashboard, driver, admin, cart, reports, tracking
 from app.database import get_db
 from fastapi.middleware.cors import CORSMiddleware
+from .geocoding import GEOCODING_MODE, close_async_client
+from .pagination import NEXT_CURSOR_HEADER
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, metrics_registry
+from .query_log import slow_query_log
+from .rollups import ensure_delivery_stats
+from .search import setup_product_search
+from .geocoding_worker import geocoding_worker
+from . import report_jobs
+from .simulation import simulation_engine
+from .tracking import tracking_hub
 
 
+slow_query_log.install(engine)
+slow_query_log.install(async_engine.sync_engine)
+
 Base.metadata.create_all(bind=engine)
+add_missing_columns(Base.metadata)
+setup_product_search(engine)
+ensure_delivery_stats()
+crud.ensure_rating_aggregates()
 
 app = FastAPI()
 
@@ -27,7 +47,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(user.router)
 app.include_router(product.router)
@@ -41,22 +63,55 @@ app.include_router(driver.router)
 app.include_router(admin.router)
 app.include_router(cart.router)
 app.include_router(reports.router)
+app.include_router(tracking.router)
+
+@app.on_event("startup")
+async def bind_tracking_hub():
+    tracking_hub.bind(asyncio.get_running_loop())
+
+
+@app.on_event("startup")
+def start_background_workers():
+    if GEOCODING_MODE == "deferred":
+        geocoding_worker.start()
+        geocoding_worker.enqueue_pending()
+
+
+@app.on_event("shutdown")
+async def close_async_resources():
+    await close_async_client()
+    await async_engine.dispose()
+
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    geocoding_worker.stop()
+    simulation_engine.stop()
+    report_jobs.shutdown()
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Prometheus scrape target
+    return Response(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 
 app.get("/")
 def read_root():
     return {"message": "Welcome to AquaFlow Backend API 🚰"}
 
 @app.post("/register", response_model=schemas.UserOut)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, user.email)
+async def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    db_user = await run_in_threadpool(crud.get_user_by_email, db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return crud.create_user(db, user)
+    hashed_password = await get_password_hash_async(user.password)
+    return await run_in_threadpool(crud.create_user, db, user, hashed_password)
 
 
 @app.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = crud.authenticate_user(db, form_data.username, form_data.password)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = await crud.authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
@@ -0,0 +1,175 @@
+# app/metrics.py
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+from .query_log import RequestContext, current_request
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)  # seconds
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+UNMATCHED = "<unmatched>"  # 404s and mounts; raw paths would explode the label set
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class RouteMetrics:
+    __slots__ = ("statuses", "latency", "statements", "db_seconds", "response_bytes")
+
+    def __init__(self):
+        self.statuses = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.db_seconds = Histogram(DB_TIME_BUCKETS)
+        self.response_bytes = Histogram(SIZE_BUCKETS)
+
+
+class MetricsRegistry:
+    """Per-route request metrics, rendered in the Prometheus text format.
+
+    Recording is a handful of list increments under one lock per request;
+    everything else (cumulative buckets, label escaping) happens at scrape time.
+    """
+
+    def __init__(self):
+        self._routes = {}
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def started(self, request: RequestContext):
+        with self._lock:
+            self._in_flight.add(request)
+
+    def finished(self, request: RequestContext, status: int, seconds: float, response_bytes: int):
+        scope = request.scope
+        route = scope.get("route")
+        key = (scope["method"], route.path if route is not None else UNMATCHED)
+        with self._lock:
+            self._in_flight.discard(request)
+            metrics = self._routes.get(key)
+            if metrics is None:
+                metrics = self._routes[key] = RouteMetrics()
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.latency.observe(seconds)
+            metrics.statements.observe(request.statements)
+            metrics.db_seconds.observe(request.db_seconds)
+            metrics.response_bytes.observe(response_bytes)
+
+    def render(self) -> str:
+        with self._lock:
+            routes = [(key, _snapshot(m)) for key, m in sorted(self._routes.items())]
+            in_flight = {}
+            for request in self._in_flight:
+                route = request.scope.get("route")
+                key = (request.scope["method"], route.path if route is not None else UNMATCHED)
+                in_flight[key] = in_flight.get(key, 0) + 1
+
+        lines = [
+            "# HELP http_requests_total Requests served, by route template and status.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, path), m in routes:
+            for status, count in sorted(m["statuses"].items()):
+                lines.append(f'http_requests_total{{method="{method}",route="{_escape(path)}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_requests_in_flight Requests being served right now; unrouted ones count as <unmatched>.",
+            "# TYPE http_requests_in_flight gauge",
+        ]
+        for (method, path) in sorted(set(in_flight) | {key for key, _ in routes}):
+            lines.append(f'http_requests_in_flight{{method="{method}",route="{_escape(path)}"}} '
+                         f'{in_flight.get((method, path), 0)}')
+
+        for name, field, help_text in (
+            ("http_request_duration_seconds", "latency", "Time from request start to the last body byte."),
+            ("http_request_db_statements", "statements", "SQL statements executed per request."),
+            ("http_request_db_seconds", "db_seconds", "Time spent executing SQL per request."),
+            ("http_response_size_bytes", "response_bytes", "Response body size."),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (method, path), m in routes:
+                labels = f'method="{method}",route="{_escape(path)}"'
+                bounds, counts, total = m[field]
+                cumulative = 0
+                for bound, count in zip(bounds + ("+Inf",), counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {round(total, 6)}")
+                lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+def _snapshot(metrics: RouteMetrics):
+    return {
+        "statuses": dict(metrics.statuses),
+        **{field: (h.bounds, list(h.counts), h.sum) for field, h in (
+            ("latency", metrics.latency), ("statements", metrics.statements),
+            ("db_seconds", metrics.db_seconds), ("response_bytes", metrics.response_bytes),
+        )},
+    }
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsMiddleware:
+    """Times each HTTP request and hands a RequestContext to the statement hooks.
+
+    Pure ASGI rather than BaseHTTPMiddleware: no extra task or body buffering,
+    so the per-request cost stays at a few microseconds.
+    """
+
+    def __init__(self, app, registry=None):
+        self.app = app
+        self.registry = registry or metrics_registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+        request = RequestContext(scope)
+        token = current_request.set(request)
+        if scope["type"] == "websocket":
+            # WebSockets still get statement attribution, not request metrics
+            try:
+                return await self.app(scope, receive, send)
+            finally:
+                current_request.reset(token)
+
+        registry = self.registry
+        response = [500, 0]  # status, body bytes
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.body":
+                response[1] += len(message.get("body", b""))
+            elif message["type"] == "http.response.start":
+                response[0] = message["status"]
+            await send(message)
+
+        registry.started(request)
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            registry.finished(request, response[0], perf_counter() - started, response[1])
+            current_request.reset(token)
+
+
+metrics_registry = MetricsRegistry()
@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, DateTime, Float, ForeignKey, Integer, String, Boolean, Enum
+from sqlalchemy import Table, Column, Date, DateTime, Float, ForeignKey, Index, Integer, String, Boolean, Enum
 from .database import Base
 from sqlalchemy.orm import relationship
 import enum
@@ -41,6 +41,10 @@ class Product(Base):
     category = Column(String, nullable=True)
     isPopular = Column(Boolean, default=False)
     rating = Column(Float, default=0.0)
+    # Maintained by crud.create_or_update_review; `python -m app.commands repair-ratings` rebuilds them
+    review_count = Column(Integer, default=0)
+    rating_sum = Column(Integer, default=0)
+    average_rating = Column(Float, default=0.0, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -83,23 +87,52 @@ class DeliveryRequest(Base):
     user_id = Column(Integer, ForeignKey("users.id"))
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Integer, nullable=False)
+    unit_price = Column(Float, nullable=True)  # product price when ordered; rollup revenue uses it
     address = Column(String, nullable=False)
-    status = Column(Enum(DeliveryStatus), default="pending")  # overall status
+    status = Column(Enum(DeliveryStatus), default="pending", index=True)  # overall status
     stage = Column(Enum(DeliveryStage), default="confirmed")  # progress status
     driver_id = Column(Integer, ForeignKey("drivers.id"), nullable=True)
     is_locked = Column(Boolean, default=False)
     latitude = Column(Float, nullable=True)   
     longitude = Column(Float, nullable=True)
+    current_latitude = Column(Float, nullable=True)   # live vehicle position while out for delivery
+    current_longitude = Column(Float, nullable=True)
     estimated_delivery_time = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)  # report periods and export ranges
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     user = relationship("User")
     product = relationship("Product")
     product.delivery_request = relationship("DeliveryRequest", back_populates="products")
     driver = relationship("Driver", back_populates="deliveries")
 
+class DailyDeliveryStats(Base):
+    __tablename__ = "daily_delivery_stats"
+
+    # One row per (creation day, status, stage); maintained by app.rollups
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(DeliveryStatus), primary_key=True)
+    stage = Column(Enum(DeliveryStage), primary_key=True)
+    deliveries = Column(Integer, nullable=False, default=0)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
+class MonthlyCategorySales(Base):
+    __tablename__ = "monthly_category_sales"
+
+    # Sales cube of delivered orders by creation month; maintained by app.rollups
+    year = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)
+    category = Column(String, primary_key=True)
+    deliveries = Column(Integer, nullable=False, default=0)
+    quantity = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)
+
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        Index("ix_notifications_user_id_created_at", "user_id", "created_at"),  # a user's feed, newest first
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -111,6 +144,10 @@ class Notification(Base):
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_created_at_id", "created_at", "id"),  # admin inbox, keyset paged
+        Index("ix_messages_user_id_created_at", "user_id", "created_at"),  # a user's own messages
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -129,11 +166,15 @@ class Driver(Base):
     name = Column(String, nullable=False)
     phone = Column(String, nullable=False, unique=True)
     vehicle = Column(String, nullable=True)
+    capacity = Column(Integer, default=100)  # max summed delivery quantity per route
 
     deliveries = relationship("DeliveryRequest", back_populates="driver")
 
 class CartItem(Base):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        Index("ix_cart_items_user_id_product_id", "user_id", "product_id"),  # cart lookups and add-to-cart
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -142,4 +183,13 @@ class CartItem(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     user = relationship("User", backref="cart_items")
-    product = relationship("Product")
\ No newline at end of file
+    product = relationship("Product")
+
+class GeocodeCacheEntry(Base):
+    __tablename__ = "geocode_cache"
+
+    address_key = Column(String, primary_key=True)  # normalized address
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    found = Column(Boolean, default=True)  # False = negative cache entry
+    updated_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,83 @@
+# app/pagination.py
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import DateTime, tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Query parameters shared by every list endpoint: ?cursor=...&limit=..."""
+
+    def __init__(
+        self,
+        response: Response,
+        cursor: str | None = Query(None, description="Opaque token from the X-Next-Cursor header"),
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    ):
+        self.response = response  # the next cursor is sent back as a header on it
+        self.cursor = cursor
+        self.limit = limit
+
+
+def encode_cursor(values) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, columns):
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor shape")
+        return [
+            datetime.fromisoformat(v) if isinstance(column.type, DateTime) else v
+            for column, v in zip(columns, values)
+        ]
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _seek(query, columns, page: PageParams, descending: bool):
+    # Works on a Query as well as on a select(); both have filter/order_by/limit
+    key = tuple_(*columns) if len(columns) > 1 else columns[0]
+    if page.cursor:
+        values = decode_cursor(page.cursor, columns)
+        after = tuple_(*values) if len(values) > 1 else values[0]
+        query = query.filter(key < after if descending else key > after)
+
+    order = [c.desc() if descending else c.asc() for c in columns]
+    return query.order_by(*order).limit(page.limit + 1)
+
+
+def _finish(items, columns, page: PageParams):
+    if len(items) > page.limit:
+        items = items[:page.limit]
+        last = items[-1]
+        page.response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, c.key) for c in columns])
+    return items
+
+
+def paginate(query, columns, page: PageParams, descending: bool = False):
+    """Keyset pagination on a unique column tuple such as (created_at, id) or (id,).
+
+    Seeks past the cursor with a row-value comparison instead of OFFSET, so deep
+    pages cost the same as the first one. The next page's token is returned in
+    the X-Next-Cursor header; it is absent on the last page.
+    """
+    columns = list(columns)
+    return _finish(_seek(query, columns, page, descending).all(), columns, page)
+
+
+async def paginate_async(db, stmt, columns, page: PageParams, descending: bool = False):
+    """paginate() for an AsyncSession and a select() of one entity."""
+    columns = list(columns)
+    result = await db.execute(_seek(stmt, columns, page, descending))
+    return _finish(list(result.scalars().all()), columns, page)
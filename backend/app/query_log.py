@@ -0,0 +1,303 @@
+# app/query_log.py
+import os
+import re
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from time import perf_counter
+
+from sqlalchemy import event
+
+from .database import Base
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG_SIZE = 200       # distinct statements kept; the cheapest are evicted first
+SLOW_QUERY_EXPLAIN = os.getenv("SLOW_QUERY_EXPLAIN", "1") != "0"
+ROUTES_PER_STATEMENT = 10
+
+_IN_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|\$\d+|:\w+)\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_SAVEPOINT = "query_log_explain"
+
+
+class RequestContext:
+    """Per-request state shared with the statement hooks.
+
+    Set by the metrics middleware; the router fills in scope["route"] on the
+    same dict, so the route template is known by the time statements run.
+    """
+    __slots__ = ("scope", "statements", "db_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+current_request = ContextVar("current_request", default=None)
+
+
+def route_name(scope) -> str:
+    """'GET /products/{product_id}' once routing has run, else the raw path."""
+    if scope is None:
+        return "background"
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "")
+    return f"{scope.get('method', 'WS')} {path}"
+
+
+def normalize_statement(statement: str) -> str:
+    # Expanded IN lists differ only in length; keep one entry per statement shape
+    statement = _IN_LIST.sub("(?...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def parameter_shape(parameters, executemany: bool = False):
+    """Bind parameters with their values replaced by type names."""
+    if executemany:
+        rows = list(parameters)
+        return {"executemany": len(rows), "row": parameter_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+class SlowQueryLog:
+    """Statements slower than the threshold, grouped by normalized SQL.
+
+    Timing comes from cursor execute events on every engine, so ORM, Core and
+    raw SQL are all covered. The first time a statement shape is slow its plan
+    is captured with EXPLAIN QUERY PLAN (SQLite) or EXPLAIN (Postgres).
+    """
+
+    def __init__(self, threshold_ms=SLOW_QUERY_MS, maxsize=SLOW_QUERY_LOG_SIZE, explain=SLOW_QUERY_EXPLAIN):
+        self.threshold_ms = threshold_ms
+        self.maxsize = maxsize
+        self.explain = explain
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.statements = 0
+        self.slow = 0
+
+    # Instrumentation
+
+    def install(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_log_started", []).append(perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = perf_counter() - conn.info["query_log_started"].pop()
+        elapsed_ms = elapsed * 1000
+        slow = elapsed_ms >= self.threshold_ms
+        request = current_request.get()
+        # Threadpool endpoints run statements concurrently
+        with self._lock:
+            self.statements += 1
+            if slow:
+                self.slow += 1
+            if request is not None:
+                request.statements += 1
+                request.db_seconds += elapsed
+        if slow:
+            self.record(conn, statement, parameters, executemany, elapsed_ms, request)
+
+    def record(self, conn, statement, parameters, executemany, elapsed_ms, request=None):
+        key = normalize_statement(statement)
+        route = route_name(request.scope if request is not None else None)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.maxsize:
+                    cheapest = min(self._entries, key=lambda k: self._entries[k]["total_ms"])
+                    del self._entries[cheapest]
+                entry = self._entries[key] = {
+                    "statement": key,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "routes": Counter(),
+                    "parameters": parameter_shape(parameters, executemany),
+                    "plan": None,
+                    "suggested_indexes": [],
+                    "first_seen": datetime.utcnow().isoformat(),
+                }
+                capture_plan = self.explain
+            else:
+                capture_plan = False
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["last_ms"] = elapsed_ms
+            entry["last_seen"] = datetime.utcnow().isoformat()
+            if route in entry["routes"] or len(entry["routes"]) < ROUTES_PER_STATEMENT:
+                entry["routes"][route] += 1
+
+        if capture_plan and not executemany:
+            plan = explain(conn, statement, parameters)
+            if plan is not None:
+                suggestions = suggest_indexes(statement, plan, conn.dialect.name, Base.metadata)
+                with self._lock:
+                    entry["plan"] = plan
+                    entry["suggested_indexes"] = suggestions
+
+    # Reporting
+
+    def offenders(self, limit: int = 20, order_by: str = "total_ms"):
+        with self._lock:
+            entries = [
+                {**entry, "routes": dict(entry["routes"].most_common()),
+                 "avg_ms": round(entry["total_ms"] / entry["count"], 2),
+                 "total_ms": round(entry["total_ms"], 2), "max_ms": round(entry["max_ms"], 2),
+                 "last_ms": round(entry["last_ms"], 2)}
+                for entry in self._entries.values()
+            ]
+        entries.sort(key=lambda e: e[order_by], reverse=True)
+        return entries[:limit]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.statements = 0
+            self.slow = 0
+
+    def stats(self):
+        with self._lock:
+            size, statements, slow = len(self._entries), self.statements, self.slow
+        return {
+            "threshold_ms": self.threshold_ms,
+            "statements": statements,
+            "slow": slow,
+            "distinct_slow": size,
+        }
+
+
+def explain(conn, statement: str, parameters):
+    """The plan for a SELECT as a list of lines, or None for any other statement."""
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return None
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    elif dialect == "postgresql":
+        prefix = "EXPLAIN "
+    else:
+        return None
+    # A raw DBAPI cursor: the EXPLAIN itself must not go through the timing events.
+    # It runs inside the request's transaction, and on Postgres a failed statement
+    # aborts that transaction, so it gets a savepoint that is always rolled back.
+    savepoint = dialect == "postgresql"
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if savepoint:
+            cursor.execute(f"SAVEPOINT {_SAVEPOINT}")
+        try:
+            cursor.execute(prefix + statement, parameters or ())
+            rows = cursor.fetchall()
+        finally:
+            if savepoint:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {_SAVEPOINT}")
+                cursor.execute(f"RELEASE SAVEPOINT {_SAVEPOINT}")
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        cursor.close()
+    if dialect == "sqlite":
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
+
+
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS (\w+))?(?!.*USING (?:COVERING )?INDEX)")
+_POSTGRES_SCAN = re.compile(r"Seq Scan on (\w+)(?: (\w+))?")
+_PLAN_TABLE = re.compile(r"(?:SCAN|SEARCH|Scan on|Scan using \w+ on) (?:TABLE )?(\w+)(?: (?:AS )?(\w+))?")
+_SORT = re.compile(r"USE TEMP B-TREE FOR ORDER BY|Sort Key")
+_SORT_KEYWORDS = {"ASC", "DESC", "NULLS", "FIRST", "LAST", "COLLATE"}
+
+
+def _columns(statement: str, names, pattern: str):
+    found = []
+    for name in names:
+        regex = pattern.format(name=name)
+        for match in re.finditer(regex, statement, re.IGNORECASE):
+            column = match.group(1)
+            if column not in found:
+                found.append(column)
+    return found
+
+
+def _table_for(sql: str, name: str) -> str:
+    """The table behind a name from the plan, which SQLite reports by alias."""
+    match = re.search(rf"\b(?:FROM|JOIN)\s+(\w+)\s+(?:AS\s+)?{re.escape(name)}\b", sql, re.IGNORECASE)
+    return match.group(1) if match else name
+
+
+def _already_indexed(metadata, table: str, columns) -> bool:
+    if metadata is None or table not in metadata.tables:
+        return False
+    for index in metadata.tables[table].indexes:
+        if [c.name for c in index.columns][:len(columns)] == columns:
+            return True
+    return False
+
+
+def suggest_indexes(statement: str, plan, dialect: str, metadata=None):
+    """Composite index suggestions for tables the plan scans in full or sorts.
+
+    Equality predicates come first, then the ORDER BY columns (or one range
+    predicate), which is the column order that lets one index both filter and
+    return rows already sorted. Indexes the models already declare are left out.
+    """
+    scan = _SQLITE_SCAN if dialect == "sqlite" else _POSTGRES_SCAN
+    tables, scanned = {}, set()
+    for line in plan:
+        line = line.strip()
+        match = _PLAN_TABLE.search(line)
+        if match:
+            tables[match.group(1)] = {match.group(1), match.group(2)} - {None}
+        match = scan.search(line)
+        if match:
+            scanned.add(match.group(1))
+    sorts = any(_SORT.search(line) for line in plan)
+    if sorts and len(tables) == 1:
+        scanned |= set(tables)  # a single-table sort can come from the index instead
+    if not scanned:
+        return []
+
+    sql = statement.replace('"', "")
+    head, *order_clause = re.split(r"\bORDER BY\b", sql, maxsplit=1, flags=re.IGNORECASE)
+    order_clause = re.split(r"\bLIMIT\b|\bOFFSET\b", order_clause[0] if order_clause else "", flags=re.IGNORECASE)[0]
+    where = (re.split(r"\bWHERE\b", head, maxsplit=1, flags=re.IGNORECASE) + [""])[1]
+
+    suggestions = []
+    for table in scanned:
+        # Unqualified column names only resolve unambiguously in single-table statements
+        names = [re.escape(n) + r"\." for n in tables.get(table, {table})]
+        if len(tables) <= 1:
+            names.append("")
+        equality = _columns(where, names, r"(?<![\w.]){name}(\w+)\s*(?:=|\bIN\b|\bIS\b)")
+        ranges = _columns(where, names, r"(?<![\w.]){name}(\w+)\s*(?:<|>|\bBETWEEN\b|\bLIKE\b)")
+        ordering = _columns(order_clause, names, r"(?<![\w.]){name}(\w+)") if sorts or equality else []
+        aliases = set().union(*tables.values(), scanned)
+        ordering = [c for c in ordering if c.upper() not in _SORT_KEYWORDS and c not in aliases]
+        columns = equality + [c for c in ordering if c not in equality]
+        if not ordering:
+            columns += [c for c in ranges[:1] if c not in columns]
+        table = _table_for(sql, table)
+        if not columns or _already_indexed(metadata, table, columns):
+            continue
+        name = f"ix_{table}_{'_'.join(columns)}"
+        suggestions.append({
+            "table": table,
+            "columns": columns,
+            "ddl": f"CREATE INDEX {name} ON {table} ({', '.join(columns)})",
+        })
+    return suggestions
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1,227 @@
+# app/report_jobs.py
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from datetime import date
+from time import monotonic, sleep
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from . import crud, models
+from .database import SessionLocal
+
+REPORT_ARTIFACT_DIR = os.getenv("REPORT_ARTIFACT_DIR", "./report_artifacts")
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "1"))
+PROGRESS_EVERY = 500  # rows between progress updates
+REPORT_SYNC_TIMEOUT = float(os.getenv("REPORT_SYNC_TIMEOUT", "60"))  # seconds the legacy GET waits for a render
+POLL_INTERVAL = 0.25
+
+_executor = None
+_executor_lock = threading.Lock()
+_jobs = {}  # key -> Future, for jobs started by this process
+_jobs_lock = threading.Lock()  # the check-then-submit in start_deliveries_pdf_job runs on the threadpool
+
+
+def _artifact_path(key: str) -> str:
+    return os.path.join(REPORT_ARTIFACT_DIR, f"{key}.pdf")
+
+
+def _status_path(key: str) -> str:
+    return os.path.join(REPORT_ARTIFACT_DIR, f"{key}.json")
+
+
+def _write_status(key: str, **status):
+    tmp = _status_path(key) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(status, f)
+    os.replace(tmp, _status_path(key))
+
+
+def _filters(start_date: date | None, end_date: date | None, status: str | None):
+    return {
+        "start_date": start_date.isoformat() if start_date else None,
+        "end_date": end_date.isoformat() if end_date else None,
+        "status": status,
+    }
+
+
+def data_watermark(db: Session, filters: dict):
+    """Changes whenever a delivery matching the filters is added, edited or removed."""
+    query = db.query(
+        func.count(models.DeliveryRequest.id),
+        func.max(models.DeliveryRequest.id),
+        func.max(models.DeliveryRequest.updated_at),
+    )
+    count, max_id, max_updated = crud.filter_deliveries(query, **_parse_filters(filters)).one()
+    return {"count": count, "max_id": max_id, "max_updated_at": max_updated.isoformat() if max_updated else None}
+
+
+def _parse_filters(filters: dict):
+    return {
+        "start_date": date.fromisoformat(filters["start_date"]) if filters["start_date"] else None,
+        "end_date": date.fromisoformat(filters["end_date"]) if filters["end_date"] else None,
+        "status": filters["status"],
+    }
+
+
+def report_key(filters: dict, watermark: dict) -> str:
+    payload = json.dumps({"report": "deliveries-pdf", "filters": filters, "watermark": watermark}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def render_deliveries_pdf(key: str, filters: dict):
+    """Runs in a worker process: renders the report to the artifact store, reporting progress."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    db = SessionLocal()
+    tmp = _artifact_path(key) + ".tmp"
+    try:
+        base = db.query(
+            models.DeliveryRequest.id,
+            models.User.username,
+            models.Product.name,
+            models.DeliveryRequest.quantity,
+            models.DeliveryRequest.status,
+            models.DeliveryRequest.stage,
+            models.DeliveryRequest.estimated_delivery_time,
+        ).outerjoin(models.User, models.DeliveryRequest.user_id == models.User.id)\
+         .outerjoin(models.Product, models.DeliveryRequest.product_id == models.Product.id)
+        query = crud.filter_deliveries(base, **_parse_filters(filters))
+        total = query.count()
+        _write_status(key, status="running", progress=0, total=total)
+
+        pdf = canvas.Canvas(tmp, pagesize=letter)
+        width, height = letter
+
+        pdf.setTitle("Delivery Report")
+        pdf.setFont("Helvetica-Bold", 16)
+        pdf.drawString(50, height - 50, "EDEN SARL - Delivery Report")
+
+        pdf.setFont("Helvetica", 12)
+        y = height - 80
+        line_height = 18
+
+        # One text object per page instead of a drawString call per row
+        text = pdf.beginText(50, y)
+        text.setLeading(line_height)
+        done = 0
+        for delivery_id, customer, product, quantity, status, stage, eta in \
+                query.order_by(models.DeliveryRequest.id).yield_per(1000):
+            text.textLine(
+                f"ID: {delivery_id} | Customer: {customer or 'N/A'} | "
+                f"Product: {product or 'N/A'} | Qty: {quantity} | "
+                f"Status: {status.value if status else 'N/A'} | Stage: {stage.value if stage else 'N/A'} | "
+                f"ETA: {eta or 'N/A'}"
+            )
+            done += 1
+            if text.getY() < 50:
+                pdf.drawText(text)
+                pdf.showPage()
+                pdf.setFont("Helvetica", 12)
+                text = pdf.beginText(50, height - 50)
+                text.setLeading(line_height)
+            if done % PROGRESS_EVERY == 0:
+                _write_status(key, status="running", progress=done, total=total)
+        pdf.drawText(text)
+        pdf.save()
+
+        os.replace(tmp, _artifact_path(key))
+        _write_status(key, status="done", progress=done, total=total)
+    except Exception as e:
+        _write_status(key, status="failed", error=str(e))
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    finally:
+        db.close()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: the worker must not inherit the parent's open DB connections and threads
+            _executor = ProcessPoolExecutor(max_workers=REPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def job_status(key: str):
+    if not re.fullmatch(r"[0-9a-f]{32}", key):
+        return None
+    path = _status_path(key)
+    if os.path.exists(_artifact_path(key)):
+        status = {"status": "done"}
+        if os.path.exists(path):
+            with open(path) as f:
+                status = {**json.load(f), "status": "done"}
+    elif os.path.exists(path):
+        with open(path) as f:
+            status = json.load(f)
+    elif key in _jobs:
+        status = {"status": "queued", "progress": 0}
+    else:
+        return None
+
+    future = _jobs.get(key)
+    if status["status"] in ("queued", "running") and future is not None and future.done() and future.exception():
+        # The worker died before it could record the failure itself
+        status = {"status": "failed", "error": str(future.exception())}
+    return {"job_id": key, **status}
+
+
+def start_deliveries_pdf_job(db: Session, start_date=None, end_date=None, status=None):
+    """Starts (or reuses) the report for these filters at the current data watermark."""
+    os.makedirs(REPORT_ARTIFACT_DIR, exist_ok=True)
+    filters = _filters(start_date, end_date, status)
+    key = report_key(filters, data_watermark(db, filters))
+
+    with _jobs_lock:
+        # Two identical requests at once must not both render (and write) the same artifact
+        current = job_status(key)
+        if current and current["status"] == "done":
+            return current
+        future = _jobs.get(key)
+        if future is not None and not future.done():
+            return current
+
+        for finished in [k for k, f in _jobs.items() if f.done()]:
+            del _jobs[finished]
+        _write_status(key, status="queued", progress=0)
+        _jobs[key] = _get_executor().submit(render_deliveries_pdf, key, filters)
+    return job_status(key)
+
+
+def wait_for_job(key: str, timeout: float = REPORT_SYNC_TIMEOUT):
+    """job_status() once the job is done or failed, or as it stands when the timeout runs out."""
+    deadline = monotonic() + timeout
+    while True:
+        status = job_status(key)
+        remaining = deadline - monotonic()
+        if status is None or status["status"] in ("done", "failed") or remaining <= 0:
+            return status
+        future = _jobs.get(key)
+        if future is not None and not future.done():
+            wait([future], timeout=min(remaining, POLL_INTERVAL))
+        else:
+            sleep(min(remaining, POLL_INTERVAL))  # started by another worker process; only the sidecar tells
+
+
+def artifact_path(key: str):
+    if not re.fullmatch(r"[0-9a-f]{32}", key):
+        return None
+    path = _artifact_path(key)
+    return path if os.path.exists(path) else None
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,310 @@
+# app/rollups.py
+import os
+import threading
+from datetime import datetime
+from time import monotonic
+
+from sqlalchemy import Date, case, delete, extract, func, insert, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import SessionLocal
+
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "5"))  # seconds
+UNCATEGORIZED = "uncategorized"
+
+
+def _value(v):
+    return getattr(v, "value", v)
+
+
+def _increment(db: Session, table, key: dict, amounts: dict):
+    """Adds amounts to the row identified by key, creating it if missing."""
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        dialect_insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        stmt = dialect_insert(table).values(**key, **amounts)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={name: table.c[name] + stmt.excluded[name] for name in amounts},
+        )
+        db.execute(stmt)
+        return
+
+    updated = db.execute(
+        update(table)
+        .where(*[table.c[name] == value for name, value in key.items()])
+        .values({name: table.c[name] + value for name, value in amounts.items()})
+    )
+    if updated.rowcount == 0:
+        db.execute(insert(table).values(**key, **amounts))
+
+
+# 📊 Daily delivery stats and the monthly sales cube
+
+def record_delivery_transitions(db: Session, transitions):
+    """Applies a batch of delivery changes to daily_delivery_stats and monthly_category_sales.
+
+    Each transition is (day, old, new, quantity, revenue, category) where old
+    and new are (status, stage) pairs, or None for a created or deleted
+    delivery. The sales cube only moves when a delivery enters or leaves the
+    delivered stage. Changes are netted per bucket first, so a batch costs one
+    upsert per touched bucket. Runs in the caller's transaction; the caller commits.
+    """
+    daily, sales = {}, {}
+    delivered = models.DeliveryStage.delivered.value
+    for day, old, new, quantity, revenue, category in transitions:
+        if day is None:
+            continue
+        old = old and tuple(_value(v) for v in old)
+        new = new and tuple(_value(v) for v in new)
+        if old == new:
+            continue
+        for bucket, sign in ((old, -1), (new, 1)):
+            if bucket is None or None in bucket:
+                continue
+            _add(daily, (day, *bucket), sign, quantity, revenue)
+
+        sign = bool(new and new[1] == delivered) - bool(old and old[1] == delivered)
+        if sign:
+            _add(sales, (day.year, day.month, category or UNCATEGORIZED), sign, quantity, revenue)
+
+    _apply(db, models.DailyDeliveryStats.__table__, ("day", "status", "stage"), daily)
+    _apply(db, models.MonthlyCategorySales.__table__, ("year", "month", "category"), sales)
+
+
+def _add(deltas, key, sign, quantity, revenue):
+    delta = deltas.setdefault(key, [0, 0, 0.0])
+    delta[0] += sign
+    delta[1] += sign * (quantity or 0)
+    delta[2] += sign * (revenue or 0)
+
+
+def _apply(db: Session, table, key_columns, deltas):
+    for key, (deliveries, quantity, revenue) in deltas.items():
+        if deliveries or quantity or revenue:
+            key = dict(zip(key_columns, key))
+            _increment(db, table, key, {"deliveries": deliveries, "quantity": quantity, "revenue": revenue})
+            if deliveries < 0:
+                # A bucket the last delivery left is dropped rather than kept at zero
+                db.execute(delete(table).where(
+                    *[table.c[name] == value for name, value in key.items()], table.c.deliveries <= 0
+                ))
+
+
+def record_delivery_change(db: Session, delivery, old=None, new=None):
+    """Rollup bookkeeping for one delivery; old/new are (status, stage) pairs.
+
+    The first call snapshots the product price on the delivery, so a later
+    price change cannot make the decrement differ from the increment.
+    """
+    if delivery.created_at is None:
+        return
+    price, category = db.query(models.Product.price, models.Product.category)\
+        .filter(models.Product.id == delivery.product_id).first() or (None, None)
+    if delivery.unit_price is None:
+        delivery.unit_price = price
+    record_delivery_transitions(db, [(
+        delivery.created_at.date(), old, new, delivery.quantity,
+        (delivery.quantity or 0) * (delivery.unit_price or 0), category,
+    )])
+
+
+def record_stage_changes(db: Session, stages: dict):
+    """Rollup bookkeeping for a batch of stage changes {delivery_id: new_stage},
+    read before the rows are updated."""
+    if not stages:
+        return
+    rows = db.query(
+        models.DeliveryRequest.id, models.DeliveryRequest.created_at,
+        models.DeliveryRequest.status, models.DeliveryRequest.stage,
+        models.DeliveryRequest.quantity, _unit_price(), models.Product.category,
+    ).outerjoin(models.Product, models.Product.id == models.DeliveryRequest.product_id)\
+     .filter(models.DeliveryRequest.id.in_(list(stages)))\
+     .all()
+    record_delivery_transitions(db, [
+        (created_at.date() if created_at else None, (status, stage), (status, stages[delivery_id]),
+         quantity, (quantity or 0) * (price or 0), category)
+        for delivery_id, created_at, status, stage, quantity, price, category in rows
+    ])
+
+
+def _unit_price():
+    # Deliveries from before the snapshot column fall back to the current price
+    return func.coalesce(models.DeliveryRequest.unit_price, models.Product.price, 0)
+
+
+def backfill_unit_prices(db: Session) -> int:
+    """Snapshots the current product price on deliveries that have none. Returns the row count."""
+    D = models.DeliveryRequest
+    price = select(models.Product.price).where(models.Product.id == D.product_id).scalar_subquery()
+    updated = db.execute(
+        update(D).where(D.unit_price.is_(None), D.product_id.isnot(None)).values(unit_price=price)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return updated
+
+
+def rebuild_delivery_stats(db: Session) -> int:
+    """Recomputes daily_delivery_stats from delivery_requests. Returns the bucket count."""
+    D = models.DeliveryRequest
+    table = models.DailyDeliveryStats.__table__
+    day = func.date(D.created_at, type_=Date)
+    buckets = select(
+        day,
+        D.status,
+        D.stage,
+        func.count(D.id),
+        func.coalesce(func.sum(D.quantity), 0),
+        func.coalesce(func.sum(D.quantity * _unit_price()), 0),
+    ).select_from(D)\
+     .outerjoin(models.Product, models.Product.id == D.product_id)\
+     .where(D.created_at.isnot(None), D.status.isnot(None), D.stage.isnot(None))\
+     .group_by(day, D.status, D.stage)
+
+    db.execute(delete(table))
+    db.execute(insert(table).from_select(
+        ["day", "status", "stage", "deliveries", "quantity", "revenue"], buckets
+    ))
+    db.commit()
+    return db.query(func.count()).select_from(table).scalar()
+
+
+def rebuild_monthly_sales(db: Session) -> int:
+    """Recomputes monthly_category_sales from delivered orders. Returns the row count."""
+    D = models.DeliveryRequest
+    table = models.MonthlyCategorySales.__table__
+    year = extract("year", D.created_at)
+    month = extract("month", D.created_at)
+    category = func.coalesce(models.Product.category, UNCATEGORIZED)
+    buckets = select(
+        year,
+        month,
+        category,
+        func.count(D.id),
+        func.coalesce(func.sum(D.quantity), 0),
+        func.coalesce(func.sum(D.quantity * _unit_price()), 0),
+    ).select_from(D)\
+     .outerjoin(models.Product, models.Product.id == D.product_id)\
+     .where(D.created_at.isnot(None), D.status.isnot(None), D.stage == models.DeliveryStage.delivered)\
+     .group_by(year, month, category)
+
+    db.execute(delete(table))
+    db.execute(insert(table).from_select(
+        ["year", "month", "category", "deliveries", "quantity", "revenue"], buckets
+    ))
+    db.commit()
+    return db.query(func.count()).select_from(table).scalar()
+
+
+def ensure_delivery_stats():
+    """Backfills the rollups on first start, when deliveries predate them."""
+    db = SessionLocal()
+    try:
+        D = models.DeliveryRequest
+        unpriced = db.query(D.id).join(models.Product, models.Product.id == D.product_id)\
+            .filter(D.unit_price.is_(None)).first()
+        if unpriced is not None:
+            # Buckets filled before the snapshot used whatever the price was at each change
+            backfill_unit_prices(db)
+            rebuild_delivery_stats(db)
+            rebuild_monthly_sales(db)
+        if db.query(D.id).first() is not None:
+            if db.query(models.DailyDeliveryStats.day).first() is None:
+                rebuild_delivery_stats(db)
+            delivered = db.query(D.id).filter(D.stage == models.DeliveryStage.delivered).first()
+            if delivered is not None and db.query(models.MonthlyCategorySales.year).first() is None:
+                rebuild_monthly_sales(db)
+    finally:
+        db.close()
+
+
+def monthly_sales(db: Session, start=None, end=None):
+    """Rows of the sales cube between two (year, month) pairs, both inclusive."""
+    C = models.MonthlyCategorySales
+    query = db.query(C.year, C.month, C.category, C.deliveries, C.quantity, C.revenue)\
+        .filter(C.deliveries > 0)
+    if start:
+        query = query.filter(tuple_(C.year, C.month) >= tuple_(*start))
+    if end:
+        query = query.filter(tuple_(C.year, C.month) <= tuple_(*end))
+    return query.order_by(C.year, C.month, C.category).all()
+
+
+def dashboard_summary(db: Session):
+    """Dashboard totals in one query over the (tiny) rollup table.
+
+    A delivery counts as delivered once its stage is delivered; it is active
+    while it is neither delivered nor rejected.
+    """
+    S = models.DailyDeliveryStats
+    today = datetime.utcnow().date()
+    customers = select(func.count(models.User.id).label("total"))\
+        .where(models.User.role == "user").subquery()
+    rows = db.execute(
+        select(
+            customers.c.total,
+            S.status,
+            S.stage,
+            func.sum(S.deliveries),
+            func.sum(case((S.day == today, S.deliveries), else_=0)),
+            func.sum(S.revenue),
+        ).select_from(customers.outerjoin(S.__table__, S.deliveries > 0))
+         .group_by(customers.c.total, S.status, S.stage)
+    ).all()
+
+    total_revenue = 0.0
+    active_orders = 0
+    deliveries_today = 0
+    total_customers = 0
+    status_distribution = {}
+    stage_distribution = {}
+    for customers_total, status, stage, deliveries, created_today, revenue in rows:
+        total_customers = customers_total
+        if status is None:
+            continue  # no rollup rows yet
+        status, stage = _value(status), _value(stage)
+        deliveries_today += created_today or 0
+        status_distribution[status] = status_distribution.get(status, 0) + deliveries
+        stage_distribution[stage] = stage_distribution.get(stage, 0) + deliveries
+        if stage == models.DeliveryStage.delivered.value:
+            total_revenue += revenue or 0
+        elif status != models.DeliveryStatus.rejected.value:
+            active_orders += deliveries
+
+    return {
+        "total_revenue": round(total_revenue, 2),
+        "active_orders": active_orders,
+        "total_customers": total_customers,
+        "deliveries_today": deliveries_today,
+        "delivery_status_distribution": status_distribution,
+        "delivery_stage_distribution": stage_distribution,
+    }
+
+
+class SummaryCache:
+    """Holds one computed value for a few seconds so auto-refreshing dashboards share it."""
+
+    def __init__(self, ttl=DASHBOARD_CACHE_TTL):
+        self.ttl = ttl
+        self._value = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, compute):
+        with self._lock:
+            if self._value is not None and self._expires_at > monotonic():
+                return self._value
+            # Computed under the lock: concurrent refreshes wait for one query
+            self._value = compute()
+            self._expires_at = monotonic() + self.ttl
+            return self._value
+
+    def clear(self):
+        with self._lock:
+            self._value = None
+
+
+dashboard_cache = SummaryCache()
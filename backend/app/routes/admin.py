@@ -1,56 +1,123 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 import csv
 from io import StringIO
-from app import models
+from datetime import date
+from app import crud, models, report_jobs, schemas
 from app.dependencies import get_current_admin_user
-from app.database import get_db
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from io import BytesIO
+from app.database import get_db, SessionLocal
+from app.catalog_cache import catalog_cache
+from app.geocoding import geocode_cache
+from app.tracking import tracking_hub
+from app.geocoding_worker import geocoding_worker
+from app.query_log import slow_query_log
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
+CSV_BATCH_SIZE = 1000
+
+CSV_HEADER = [
+    "Delivery ID", "Customer", "Product", "Quantity", "Address", "Status",
+    "Stage", "Driver Name", "Estimated Time", "Latitude", "Longitude", "Requested At"
+]
+
+
+def iter_deliveries_csv(start_date=None, end_date=None, status=None, batch_size=CSV_BATCH_SIZE):
+    # Own session: the request-scoped one may be closed before the body finishes streaming
+    db = SessionLocal()
+    try:
+        # Flat columns with outer joins instead of lazy-loading user/product/driver per row
+        query = db.query(
+            models.DeliveryRequest.id,
+            models.User.username,
+            models.Product.name,
+            models.DeliveryRequest.quantity,
+            models.DeliveryRequest.address,
+            models.DeliveryRequest.status,
+            models.DeliveryRequest.stage,
+            models.Driver.name,
+            models.DeliveryRequest.estimated_delivery_time,
+            models.DeliveryRequest.latitude,
+            models.DeliveryRequest.longitude,
+            models.DeliveryRequest.created_at,
+        ).outerjoin(models.User, models.DeliveryRequest.user_id == models.User.id)\
+         .outerjoin(models.Product, models.DeliveryRequest.product_id == models.Product.id)\
+         .outerjoin(models.Driver, models.DeliveryRequest.driver_id == models.Driver.id)
+        query = crud.filter_deliveries(query, start_date, end_date, status)\
+            .order_by(models.DeliveryRequest.id)\
+            .execution_options(stream_results=True)\
+            .yield_per(batch_size)
+
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_HEADER)
+        rows = 0
+        for (delivery_id, customer, product, quantity, address, status_, stage,
+             driver, eta, lat, lng, created_at) in query:
+            writer.writerow([
+                delivery_id, customer or "", product or "", quantity, address,
+                status_.value if status_ else "", stage.value if stage else "",
+                driver or "", eta or "", lat, lng, created_at,
+            ])
+            rows += 1
+            if rows % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    finally:
+        db.close()
+
+
 @router.get("/export-deliveries")
 def export_deliveries_csv(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    status: schemas.DeliveryStatus | None = None,
+    current_admin: models.User = Depends(get_current_admin_user)
+):
+    return StreamingResponse(
+        iter_deliveries_csv(start_date, end_date, status.value if status else None),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=deliveries.csv"},
+    )
+
+
+
+
+# 📄 PDF reports render in a worker process and are cached per filters + data watermark
+@router.post("/reports/deliveries-pdf")
+def start_deliveries_pdf_report(
+    start_date: date | None = None,
+    end_date: date | None = None,
+    status: schemas.DeliveryStatus | None = None,
     db: Session = Depends(get_db),
     current_admin: models.User = Depends(get_current_admin_user)
 ):
-    deliveries = db.query(models.DeliveryRequest).all()
-
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # ✅ Updated Header
-    writer.writerow([
-        "Delivery ID", "Customer", "Product", "Quantity", "Address", "Status",
-        "Stage", "Driver Name", "Estimated Time", "Latitude", "Longitude", "Requested At"
-    ])
-    
-    # ✅ Updated Rows
-    for d in deliveries:
-        writer.writerow([
-            d.id,
-            d.user.username if d.user else "",          # 💬 Customer name
-            d.product.name if d.product else "",        # 📦 Product name
-            d.quantity,
-            d.address,
-            d.status,
-            d.stage,
-            d.driver.name if d.driver else "",          # 🚚 Driver name
-            d.estimated_delivery_time or "",
-            d.latitude,
-            d.longitude,
-            d.created_at
-        ])
-
-    output.seek(0)
-    return StreamingResponse(output, media_type="text/csv", headers={
-        "Content-Disposition": "attachment; filename=deliveries.csv"
-    })
+    return report_jobs.start_deliveries_pdf_job(db, start_date, end_date, status.value if status else None)
 
 
+@router.get("/reports/{job_id}")
+def get_report_status(
+    job_id: str,
+    current_admin: models.User = Depends(get_current_admin_user)
+):
+    status = report_jobs.job_status(job_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return status
+
+
+@router.get("/reports/{job_id}/download")
+def download_report(
+    job_id: str,
+    current_admin: models.User = Depends(get_current_admin_user)
+):
+    path = report_jobs.artifact_path(job_id)
+    if not path:
+        raise HTTPException(status_code=404, detail="Report not ready")
+    return FileResponse(path, media_type="application/pdf", filename="delivery_report.pdf")
 
 
 @router.get("/export-deliveries-pdf")
@@ -58,37 +125,48 @@ def export_deliveries_pdf(
     db: Session = Depends(get_db),
     current_admin: models.User = Depends(get_current_admin_user)
 ):
-    deliveries = db.query(models.DeliveryRequest).all()
-
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-
-    pdf.setTitle("Delivery Report")
-    pdf.setFont("Helvetica-Bold", 16)
-    pdf.drawString(50, height - 50, "EDEN SARL - Delivery Report")
-
-    pdf.setFont("Helvetica", 12)
-    y = height - 80
-    line_height = 18
-
-    for d in deliveries:
-        text = (
-            f"ID: {d.id} | Customer: {d.user.username if d.user else 'N/A'} | "
-            f"Product: {d.product.name if d.product else 'N/A'} | Qty: {d.quantity} | "
-            f"Status: {d.status} | Stage: {d.stage} | ETA: {d.estimated_delivery_time or 'N/A'}"
-        )
-        pdf.drawString(50, y, text)
-        y -= line_height
-
-        if y < 50:
-            pdf.showPage()
-            y = height - 50
-            pdf.setFont("Helvetica", 12)
-
-    pdf.save()
-    buffer.seek(0)
-
-    return StreamingResponse(buffer, media_type="application/pdf", headers={
-        "Content-Disposition": "attachment; filename=delivery_report.pdf"
-    })
+    """The full delivery report as a PDF, as before the report jobs existed.
+
+    Renders through the same cached job as POST /admin/reports/deliveries-pdf
+    and waits for it. Only when rendering takes longer than REPORT_SYNC_TIMEOUT
+    does it answer 202 with the job, whose Location header points at the status
+    endpoint; new clients should use the job endpoints directly.
+    """
+    job = report_jobs.start_deliveries_pdf_job(db)
+    db.close()  # the request's session (shared with auth) must not hold a connection while we wait
+    job = report_jobs.wait_for_job(job["job_id"])
+    if job["status"] == "done":
+        return FileResponse(report_jobs.artifact_path(job["job_id"]), media_type="application/pdf",
+                            filename="delivery_report.pdf")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=f"Report failed: {job.get('error')}")
+    return JSONResponse(status_code=202, content=job, headers={"Location": f"/admin/reports/{job['job_id']}"})
+
+
+@router.get("/geocode-cache")
+def geocode_cache_stats(current_admin: models.User = Depends(get_current_admin_user)):
+    return {**geocode_cache.stats(), "worker": geocoding_worker.stats()}
+
+
+@router.get("/catalog-cache")
+def catalog_cache_stats(current_admin: models.User = Depends(get_current_admin_user)):
+    return catalog_cache.stats()
+
+
+@router.get("/tracking-hub")
+def tracking_hub_stats(current_admin: models.User = Depends(get_current_admin_user)):
+    return tracking_hub.stats()
+
+
+@router.get("/slow-queries")
+def slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    sort: str = Query("total_ms", pattern="^(total_ms|max_ms|avg_ms|count)$"),
+    current_admin: models.User = Depends(get_current_admin_user)
+):
+    return {**slow_query_log.stats(), "offenders": slow_query_log.offenders(limit, sort)}
+
+
+@router.delete("/slow-queries", status_code=204)
+def clear_slow_queries(current_admin: models.User = Depends(get_current_admin_user)):
+    slow_query_log.clear()
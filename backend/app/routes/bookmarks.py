@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from app import schemas, crud, models
 from app.database import get_db
 from app.dependencies import get_current_user
+from app.pagination import PageParams
 
 router = APIRouter(prefix="/bookmarks", tags=["Bookmarks"])
 
@@ -35,7 +36,8 @@ def remove_bookmark(
 # ✅ Get all bookmarks for current user
 @router.get("/", response_model=list[schemas.BookmarkedProduct])
 def list_user_bookmarks(
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    return crud.get_user_bookmarks(db, current_user.id)
+    return crud.get_user_bookmarks(db, current_user.id, page)
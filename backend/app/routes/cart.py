@@ -1,23 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app import schemas, crud, models
-from app.database import get_db
-from app.dependencies import get_current_user
+from app import schemas, crud, crud_async, models
+from app.database import get_async_db, get_db
+from app.dependencies import get_current_user, get_current_user_async
+from app.pagination import PageParams
 
 router = APIRouter(prefix="/cart", tags=["Cart"])
 
 @router.post("/add")
-def add_item(
+async def add_item(
     item: schemas.CartItemCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
 ):
-    crud.add_to_cart(db, current_user.id, item)
+    await crud_async.add_to_cart(db, current_user.id, item)
     return {"message": "Added to cart"}
 
 @router.get("/", response_model=list[schemas.CartItemOut])
-def view_cart(db: Session = Depends(get_db), current_user: models.User = Depends(get_current_user)):
-    return crud.get_cart_items(db, current_user.id)
+async def view_cart(
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
+):
+    return await crud_async.get_cart_items(db, current_user.id, page)
 
 
 @router.delete("/{product_id}")
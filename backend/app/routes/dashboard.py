@@ -1,68 +1,54 @@
 # app/routes/dashboard.py
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import date
-from app import models
 from app.database import get_db
+from app.rollups import dashboard_cache, dashboard_summary, monthly_sales
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
 @router.get("/summary")
 def get_dashboard_summary(db: Session = Depends(get_db)):
-    today = date.today()
-
-    # Total Revenue
-    total_revenue = db.query(func.sum(models.DeliveryRequest.total_price))\
-        .filter(models.DeliveryRequest.status == "delivered").scalar() or 0
-
-    # Active Orders
-    active_orders = db.query(models.DeliveryRequest)\
-        .filter(models.DeliveryRequest.status != "delivered").count()
-
-    # Total Customers
-    total_customers = db.query(models.User)\
-        .filter(models.User.role == "user").count()
+    # One query over daily_delivery_stats, shared by every dashboard for a few seconds
+    return dashboard_cache.get_or_compute(lambda: dashboard_summary(db))
 
-    # Deliveries Today
-    deliveries_today = db.query(models.DeliveryRequest)\
-        .filter(func.date(models.DeliveryRequest.created_at) == today).count()
 
-    # Delivery Status Distribution
-    delivery_status = db.query(
-        models.DeliveryRequest.status,
-        func.count(models.DeliveryRequest.id)
-    ).group_by(models.DeliveryRequest.status).all()
+def _year_month(value: str | None):
+    return tuple(int(part) for part in value.split("-")) if value else None
 
-    delivery_status_distribution = {
-        status: count for status, count in delivery_status
-    }
-
-    return {
-        "total_revenue": total_revenue,
-        "active_orders": active_orders,
-        "total_customers": total_customers,
-        "deliveries_today": deliveries_today,
-        "delivery_status_distribution": delivery_status_distribution
-    }
 
 @router.get("/monthly-sales")
-def get_monthly_sales_trends(db: Session = Depends(get_db)):
-    sales = db.query(
-        func.strftime("%m", models.DeliveryRequest.created_at).label("month"),
-        models.Product.category,
-        func.sum(models.DeliveryRequest.quantity).label("total_sold")
-    ).join(models.Product, models.DeliveryRequest.product_id == models.Product.id)\
-     .filter(models.DeliveryRequest.status == "delivered")\
-     .group_by("month", models.Product.category)\
-     .order_by("month")\
-     .all()
+def get_monthly_sales_trends(
+    start: str | None = Query(None, pattern=MONTH_PATTERN, description="First month, YYYY-MM"),
+    end: str | None = Query(None, pattern=MONTH_PATTERN, description="Last month, YYYY-MM"),
+    metric: str = Query("quantity", pattern="^(quantity|revenue)$"),
+    db: Session = Depends(get_db)
+):
+    # Reads the precomputed sales cube: one row per (month, category)
+    sales = monthly_sales(db, _year_month(start), _year_month(end))
 
     # Structure data for chart usage
     result = {}
-    for month, category, total in sales:
-        if month not in result:
-            result[month] = {}
-        result[month][category] = total
+    for year, month, category, deliveries, quantity, revenue in sales:
+        key = f"{year:04d}-{month:02d}"
+        if key not in result:
+            result[key] = {}
+        result[key][category] = quantity if metric == "quantity" else round(revenue, 2)
 
     return result
+
+
+@router.get("/sales-by-category")
+def get_sales_by_category(
+    start: str | None = Query(None, pattern=MONTH_PATTERN, description="First month, YYYY-MM"),
+    end: str | None = Query(None, pattern=MONTH_PATTERN, description="Last month, YYYY-MM"),
+    db: Session = Depends(get_db)
+):
+    totals = {}
+    for year, month, category, deliveries, quantity, revenue in monthly_sales(db, _year_month(start), _year_month(end)):
+        total = totals.setdefault(category, {"deliveries": 0, "quantity": 0, "revenue": 0.0})
+        total["deliveries"] += deliveries
+        total["quantity"] += quantity
+        total["revenue"] = round(total["revenue"] + revenue, 2)
+    return totals
@@ -1,25 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 from pydantic import BaseModel
-from random import uniform
-import asyncio
-from app import schemas, models, crud
-from app.dependencies import get_current_user, get_current_admin_user
-from app.database import get_db
-from app.crud import optimize_delivery_route
+from app import schemas, models, crud, crud_async
+from app.dependencies import get_current_user, get_current_user_async, get_current_admin_user
+from app.database import get_async_db, get_db
+from app.pagination import PageParams
+from app.rollups import record_delivery_change
+from app.simulation import simulation_engine
+from app.routing import optimize_route, plan_routes
 
 router = APIRouter(prefix="/delivery", tags=["Delivery"])
 
 
 # 🚚 User creates delivery request
 @router.post("/", response_model=schemas.DeliveryRequestOut)
-def request_delivery(
+async def request_delivery(
     delivery_data: schemas.DeliveryRequestCreate,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
 ):
-    return crud.create_delivery_request(db, user_id=current_user.id, request_data=delivery_data)
+    return await crud_async.create_delivery_request(db, user_id=current_user.id, request_data=delivery_data)
 
 
 # 📦 Admin updates delivery status (pending/approved/rejected)
@@ -39,10 +41,11 @@ def update_delivery_status(
 # 👀 Admin views all delivery requests
 @router.get("/requests", response_model=List[schemas.DeliveryRequestOut])
 def get_all_delivery_requests(
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_admin: models.User = Depends(get_current_admin_user)
 ):
-    return db.query(models.DeliveryRequest).all()
+    return crud.get_all_delivery_requests(db, page)
 
 
 # 🚚 Admin updates delivery tracking stage
@@ -61,11 +64,12 @@ def update_tracking(
 
 # 📍 User views their own delivery tracking
 @router.get("/track", response_model=List[schemas.DeliveryRequestOut])
-def track_my_deliveries(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+async def track_my_deliveries(
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
 ):
-    return crud.get_user_delivery_tracking(db, current_user.id)
+    return await crud_async.get_user_delivery_tracking(db, current_user.id, page)
 
 
 # 🗑️ Admin deletes a delivery request
@@ -79,6 +83,7 @@ def delete_delivery_request(
     if not request:
         raise HTTPException(status_code=404, detail="Delivery request not found")
 
+    record_delivery_change(db, request, old=(request.status, request.stage))
     db.delete(request)
     db.commit()
     return {"message": f"Delivery request {delivery_id} deleted successfully"}
@@ -87,22 +92,47 @@ def delete_delivery_request(
 # 🧠 Smart optimized route (AI-based)
 @router.get("/optimized-route", response_model=List[schemas.DeliveryRequestOut])
 def get_optimized_route(
+    time_budget: float = Query(1.0, gt=0, le=10),
     db: Session = Depends(get_db),
     current_admin: models.User = Depends(get_current_admin_user)
 ):
-    deliveries = db.query(models.DeliveryRequest)\
-                   .filter(models.DeliveryRequest.status == "pending")\
-                   .filter(models.DeliveryRequest.latitude.isnot(None))\
-                   .filter(models.DeliveryRequest.longitude.isnot(None))\
-                   .all()
+    query = db.query(models.DeliveryRequest)\
+              .filter(models.DeliveryRequest.status == "pending")\
+              .filter(models.DeliveryRequest.latitude.isnot(None))\
+              .filter(models.DeliveryRequest.longitude.isnot(None))
+    deliveries = crud.with_response_options(query, schemas.DeliveryRequestOut).all()
 
     if not deliveries:
         raise HTTPException(status_code=404, detail="No deliveries to optimize")
 
-    ordered = optimize_delivery_route(deliveries)
+    ordered = optimize_route(deliveries, time_budget=time_budget)
     return ordered
 
 
+# 🗺️ Split pending deliveries across all drivers under vehicle capacity
+@router.get("/plan-routes", response_model=schemas.RoutePlanOut)
+def get_route_plan(
+    time_limit: float = Query(5.0, gt=0, le=60),
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin_user)
+):
+    query = db.query(models.DeliveryRequest)\
+              .filter(models.DeliveryRequest.status == "pending")\
+              .filter(models.DeliveryRequest.is_locked == False)\
+              .filter(models.DeliveryRequest.latitude.isnot(None))\
+              .filter(models.DeliveryRequest.longitude.isnot(None))
+    deliveries = crud.with_response_options(query, schemas.DeliveryRequestOut).all()
+    if not deliveries:
+        raise HTTPException(status_code=404, detail="No deliveries to plan")
+
+    drivers = db.query(models.Driver).order_by(models.Driver.id).all()
+    if not drivers:
+        raise HTTPException(status_code=404, detail="No drivers available")
+
+    routes, unassigned = plan_routes(deliveries, drivers, time_limit=time_limit)
+    return {"routes": routes, "unassigned": unassigned}
+
+
 # ✅ Pydantic model for assigning a driver to multiple deliveries
 class AssignDriverRequest(BaseModel):
     delivery_ids: List[int]
@@ -120,18 +150,13 @@ def assign_driver_to_route(
     if not driver:
         raise HTTPException(status_code=404, detail="Driver not found")
 
-    updated_count = 0
-    for delivery_id in data.delivery_ids:
-        delivery = db.query(models.DeliveryRequest).filter(models.DeliveryRequest.id == delivery_id).first()
-        if delivery:
-            if delivery.is_locked:
-                continue 
-            delivery.driver = driver
-            delivery.is_locked = True
-            db.commit()
-            updated_count += 1
-
-    return {"message": f"Driver assigned to {updated_count} deliveries."}
+    # Locked or unknown ids are skipped, never overwritten
+    assigned, skipped = crud.assign_driver_bulk(db, driver.id, data.delivery_ids)
+    return {
+        "message": f"Driver assigned to {len(assigned)} deliveries.",
+        "assigned": assigned,
+        "skipped": skipped,
+    }
 
 
 @router.put("/{delivery_id}/unlock")
@@ -148,40 +173,9 @@ def unlock_delivery(
     db.commit()
     return {"message": f"Delivery {delivery_id} has been unlocked"}
 
-async def run_delivery_simulation(delivery_id: int):
-    from app.database import SessionLocal
-    db = SessionLocal()
-
-    try:
-        delivery = db.query(models.DeliveryRequest).filter(models.DeliveryRequest.id == delivery_id).first()
-        if not delivery:
-            return
-
-        # Simulated waypoints (add more if you want)
-        steps = [
-            "confirmed",
-            "out_for_delivery",
-            "delivered"
-        ]
-
-        for step in steps:
-            delivery.stage = step
-
-            # Randomly simulate small GPS drift
-            if delivery.latitude and delivery.longitude:
-                delivery.latitude += uniform(-0.0002, 0.0002)
-                delivery.longitude += uniform(-0.0002, 0.0002)
-
-            db.commit()
-            await asyncio.sleep(5)  # wait 5s between steps
-
-    finally:
-        db.close()
-
 @router.post("/simulate/{delivery_id}")
-async def simulate_delivery_tracking(
+def simulate_delivery_tracking(
     delivery_id: int,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_admin: models.User = Depends(get_current_admin_user)
 ):
@@ -194,10 +188,35 @@ async def simulate_delivery_tracking(
     if delivery.stage == "delivered":
         raise HTTPException(status_code=400, detail="Already delivered")
 
-    # Start background simulation
-    background_tasks.add_task(run_delivery_simulation, delivery.id)
+    if delivery.latitude is None or delivery.longitude is None:
+        raise HTTPException(status_code=400, detail="Delivery has no coordinates yet")
+
+    # Hand the trip to the shared simulation engine
+    simulation_engine.add([delivery.id])
     return {"message": f"Simulation started for delivery {delivery_id}"}
 
+
+# 🛰️ Admin starts many simulated trips at once
+@router.post("/simulation")
+def start_simulation(
+    settings: schemas.SimulationStart,
+    current_admin: models.User = Depends(get_current_admin_user)
+):
+    simulation_engine.configure(tick_seconds=settings.tick_seconds, speed_factor=settings.speed_factor)
+    added = simulation_engine.add(settings.delivery_ids, limit=settings.limit)
+    return {"message": f"{added} deliveries added to the simulation", **simulation_engine.stats()}
+
+
+@router.get("/simulation")
+def get_simulation_stats(current_admin: models.User = Depends(get_current_admin_user)):
+    return simulation_engine.stats()
+
+
+@router.delete("/simulation")
+def stop_simulation(current_admin: models.User = Depends(get_current_admin_user)):
+    cancelled = simulation_engine.cancel()
+    return {"message": f"{cancelled} simulated deliveries cancelled"}
+
 @router.get("/{delivery_id}/map")
 def get_delivery_location(
     delivery_id: int,
@@ -216,6 +235,8 @@ def get_delivery_location(
         "stage": delivery.stage,
         "latitude": delivery.latitude,
         "longitude": delivery.longitude,
+        "current_latitude": delivery.current_latitude,
+        "current_longitude": delivery.current_longitude,
         "status": delivery.status,
         "updated_at": delivery.updated_at,
         "driver": {
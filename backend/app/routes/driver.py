@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app import schemas, models
 from app.database import get_db
+from app.pagination import PageParams, paginate
 
 router = APIRouter(prefix="/drivers", tags=["Drivers"])
 
@@ -14,5 +15,5 @@ def create_driver(driver: schemas.DriverCreate, db: Session = Depends(get_db)):
     return new_driver
 
 @router.get("/", response_model=list[schemas.DriverOut])
-def get_all_drivers(db: Session = Depends(get_db)):
-    return db.query(models.Driver).all()
+def get_all_drivers(page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return paginate(db.query(models.Driver), (models.Driver.id,), page)
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app import schemas, models, crud
 from app.dependencies import get_current_user, get_current_admin_user
 from app.database import get_db
+from app.pagination import PageParams
 
 
 router = APIRouter(prefix="/messages", tags=["Messages"])
@@ -17,10 +18,11 @@ def send_message(
 
 @router.get("/", response_model=list[schemas.MessageOut])
 def get_messages(
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_admin: models.User = Depends(get_current_admin_user)
 ):
-    return crud.get_all_messages(db)
+    return crud.get_all_messages(db, page)
 
 @router.put("/{message_id}/respond", response_model=schemas.MessageOut)
 def respond_to_message(
@@ -36,7 +38,8 @@ def respond_to_message(
 
 @router.get("/my", response_model=list[schemas.MessageOut])
 def get_my_messages(
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_user)
 ):
-    return db.query(models.Message).filter(models.Message.user_id == current_user.id).order_by(models.Message.created_at.desc()).all()
+    return crud.get_user_messages(db, current_user.id, page)
@@ -1,19 +1,20 @@
 from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app import crud, models, schemas
-from app.database import get_db
-from app.dependencies import get_current_user
+from app import crud, crud_async, models, schemas
+from app.database import get_async_db, get_db
+from app.dependencies import get_current_user, get_current_user_async
+from app.pagination import PageParams
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
 @router.get("/", response_model=list[schemas.NotificationOut])
-def get_notifications(
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_user)
+async def get_notifications(
+    page: PageParams = Depends(),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_async)
 ):
-    notifications = crud.get_user_notifications(db, current_user.id)
-    print("Found Notifications:", notifications)
-    return notifications
+    return await crud_async.get_user_notifications(db, current_user.id, page)
 
 @router.put("/mark-read")
 def mark_notifications_read(
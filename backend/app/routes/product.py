@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app import crud, schemas, database, models
+from app import crud, crud_async, schemas, database, models
 from app.dependencies import get_current_user, get_current_admin_user
+from app.catalog_cache import catalog_cache
+from app.pagination import NEXT_CURSOR_HEADER, PageParams
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
@@ -15,60 +18,53 @@ def create_product(
     # Create the product
     new_product = crud.create_product(db, product)
 
-    # Get all active users
-    users = db.query(models.User).filter(models.User.is_active == True).all()
-
-    # Notify each user about the new product
-    for user in users:
-        crud.create_notification(
-            db,
-            user_id=user.id,
-            message=f"A new product '{new_product.name}' has been added!"
-        )
+    # Notify every active user about the new product in one statement
+    crud.notify_active_users(db, message=f"A new product '{new_product.name}' has been added!")
 
     return new_product
 
 
 @router.get("/", response_model=list[schemas.ProductOut]) 
-def list_products(
-    skip: int = 0,
-    limit: int = 100,
+async def list_products(
+    request: Request,
+    page: PageParams = Depends(),
     category: str = None,
     is_popular: bool = None,
     min_price: float = None,
     max_price: float = None,
     search: str = None,
-    db: Session = Depends(database.get_db)
+    sort: str = Query(None, pattern="^(rating)$"),
+    db: AsyncSession = Depends(database.get_async_db)
 ):
-    query = db.query(models.Product)
-
-    if category:
-        query = query.filter(models.Product.category == category)
-
-    if is_popular is not None:
-        query = query.filter(models.Product.isPopular == is_popular)
+    cached = catalog_cache.cached_response(request)
+    if cached:
+        return cached
+    version = catalog_cache.version
 
-    if min_price is not None:
-        query = query.filter(models.Product.price >= min_price)
+    products = await crud_async.get_products(
+        db, page, category=category, is_popular=is_popular,
+        min_price=min_price, max_price=max_price, search=search, sort=sort,
+    )
 
-    if max_price is not None:
-        query = query.filter(models.Product.price <= max_price)
-
-    if search:
-        query = query.filter(
-            models.Product.name.ilike(f"%{search}%") |
-            models.Product.description.ilike(f"%{search}%")
-        )
-
-    return query.offset(skip).limit(limit).all()
+    next_cursor = page.response.headers.get(NEXT_CURSOR_HEADER)
+    return catalog_cache.store_response(
+        request, version,
+        [schemas.ProductOut.model_validate(p, from_attributes=True) for p in products],
+        {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None,
+    )
 
 
 @router.get("/{product_id}", response_model=schemas.ProductOut)
-def read_product(product_id: int, db: Session = Depends(database.get_db)):
+def read_product(product_id: int, request: Request, db: Session = Depends(database.get_db)):
+    cached = catalog_cache.cached_response(request)
+    if cached:
+        return cached
+    version = catalog_cache.version
+
     product = crud.get_product(db, product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return product
+    return catalog_cache.store_response(request, version, schemas.ProductOut.model_validate(product, from_attributes=True))
 
 
 @router.put("/{product_id}", response_model=schemas.ProductOut)
@@ -102,21 +98,33 @@ def get_product_reviews(product_id: int, db: Session = Depends(database.get_db))
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
-    reviews = db.query(models.ProductReview).filter(models.ProductReview.product_id == product_id).all()
+    # Usernames come from the join, not from a lazy r.user load per review
+    reviews = db.query(
+        models.ProductReview.id,
+        models.ProductReview.rating,
+        models.ProductReview.comment,
+        models.User.username,
+        models.ProductReview.created_at,
+    ).join(models.User, models.ProductReview.user_id == models.User.id)\
+     .filter(models.ProductReview.product_id == product_id)\
+     .order_by(models.ProductReview.id.desc())\
+     .all()
 
     return {
         "product": {
             "id": product.id,
             "name": product.name,
             "description": product.description,
+            "review_count": product.review_count,
+            "average_rating": product.average_rating,
         },
         "reviews": [
             {
-                "id": r.id,
-                "rating": r.rating,
-                "comment": r.comment,
-                "user_name": r.user.username,
-                "created_at": r.created_at,
-            } for r in reviews
+                "id": review_id,
+                "rating": rating,
+                "comment": comment,
+                "user_name": username,
+                "created_at": created_at,
+            } for review_id, rating, comment, username, created_at in reviews
         ]
     }
@@ -1,57 +1,90 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app import schemas, crud, models
+from app.analytics import PERIODS, get_report
 from app.database import get_db
 from app.dependencies import get_current_admin_user
+from app.rollups import dashboard_cache, dashboard_summary as rollup_summary, monthly_sales
 
 router = APIRouter(prefix="/reports", tags=["Reports"])
+
+PERIOD_PATTERN = "^(" + "|".join(PERIODS) + ")$"
+RECENT_ORDERS = 5
+
+
 @router.get("/summary")
-def get_summary(db: Session = Depends(get_db), current_admin: models.User = Depends(get_current_admin_user)):
-    
-    return {
-        "total_revenue": 14500000,
-        "avg_order_value": 58450,
-        "retention_rate": 89.2,
-        "success_rate": 96.8,
-    }
+def get_summary(
+    period: str = Query("30d", pattern=PERIOD_PATTERN),
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin_user)
+):
+    return get_report(db, period)["summary"]
 
 
 @router.get("/monthly")
-def get_monthly_revenue(db: Session = Depends(get_db), current_admin: models.User = Depends(get_current_admin_user)):
-    return [
-        {"month": "Jan", "revenue": 1850000, "orders": 245, "customers": 45},
-    ]
+def get_monthly_revenue(
+    period: str = Query("365d", pattern=PERIOD_PATTERN),
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin_user)
+):
+    return get_report(db, period)["monthly"]
 
 
 @router.get("/products")
-def get_top_products(db: Session = Depends(get_db), current_admin: models.User = Depends(get_current_admin_user)):
-    return [
-        {"product": "Pure Life Sachets", "sales": 45000, "revenue": 1800000},
-    ]
+def get_top_products(
+    period: str = Query("30d", pattern=PERIOD_PATTERN),
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin_user)
+):
+    return get_report(db, period)["products"]
 
 
 @router.get("/segments")
-def get_customer_segments(db: Session = Depends(get_db), current_admin: models.User = Depends(get_current_admin_user)):
-    return [
-        {"name": "Retailers", "value": 65, "color": "#0ea5e9"},
-    ]
+def get_customer_segments(
+    period: str = Query("90d", pattern=PERIOD_PATTERN),
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin_user)
+):
+    return get_report(db, period)["segments"]
 
 
 @router.get("/weekly-deliveries")
-def get_weekly_deliveries(db: Session = Depends(get_db), current_admin: models.User = Depends(get_current_admin_user)):
-    return [
-        {"day": "Mon", "delivered": 45, "pending": 8, "delayed": 2},
-    ]
+def get_weekly_deliveries(
+    period: str = Query("7d", pattern=PERIOD_PATTERN),
+    db: Session = Depends(get_db),
+    current_admin: models.User = Depends(get_current_admin_user)
+):
+    return get_report(db, period)["weekly_deliveries"]
+
 
 @router.get("/dashboard")
-def dashboard_summary(db: Session = Depends(get_db), current_admin: User = Depends(get_current_admin_user)):
+def dashboard_summary(db: Session = Depends(get_db), current_admin: models.User = Depends(get_current_admin_user)):
+    totals = dashboard_cache.get_or_compute(lambda: rollup_summary(db))
+    report = get_report(db, "30d")
+
+    recent = crud.with_response_options(db.query(models.DeliveryRequest), schemas.DeliveryRequestOut)\
+        .order_by(models.DeliveryRequest.id.desc())\
+        .limit(RECENT_ORDERS).all()
+
+    trends = {}
+    for year, month, category, deliveries, quantity, revenue in monthly_sales(db):
+        trend = trends.setdefault(f"{year:04d}-{month:02d}", {"revenue": 0.0, "orders": 0})
+        trend["revenue"] = round(trend["revenue"] + revenue, 2)
+        trend["orders"] += deliveries
+
+    alerts = []
+    if report["delayed_orders"]:
+        alerts.append({"type": "warning", "message": f"{report['delayed_orders']} orders open for more than a day"})
+
     return {
-        "totalRevenue": 24500000,
-        "activeOrders": 142,
-        "totalCustomers": 1248,
-        "deliveriesToday": 89,
-        "recentOrders": [...],
-        "deliveryStatus": [...],
-        "salesTrends": [...],
-        "alerts": [...],
+        "totalRevenue": totals["total_revenue"],
+        "activeOrders": totals["active_orders"],
+        "totalCustomers": totals["total_customers"],
+        "deliveriesToday": totals["deliveries_today"],
+        "recentOrders": [schemas.DeliveryRequestOut.model_validate(d, from_attributes=True) for d in recent],
+        "deliveryStatus": [
+            {"status": status, "count": count} for status, count in totals["delivery_status_distribution"].items()
+        ],
+        "salesTrends": [{"month": month, **trend} for month, trend in sorted(trends.items())],
+        "alerts": alerts,
     }
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from app import crud, schemas, database, models
 from app.dependencies import get_current_user, get_current_admin_user
 from app.database import get_db
+from app.pagination import PageParams
 
 router = APIRouter(prefix="/reviews", tags=["Reviews"])
 
@@ -17,8 +18,8 @@ def submit_review(
 
 
 @router.get("/product/{product_id}", response_model=list[schemas.ReviewOut])
-def list_reviews(product_id: int, db: Session = Depends(get_db)):
-    return crud.get_reviews_by_product(db, product_id)
+def list_reviews(product_id: int, page: PageParams = Depends(), db: Session = Depends(get_db)):
+    return crud.get_reviews_by_product(db, product_id, page)
 
 
 @router.get("/product/{product_id}/average")
@@ -0,0 +1,146 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from fastapi.security.utils import get_authorization_scheme_param
+
+from app import models
+from app.database import SessionLocal
+from app.dependencies import get_user_from_token
+from app.tracking import delivery_event, tracking_hub
+
+router = APIRouter(prefix="/tracking", tags=["Tracking"])
+
+HEARTBEAT_SECONDS = 15
+
+
+def _authorize(token: str, delivery_id: int | None):
+    """Resolves the user and checks access with a short-lived session, so an open
+    stream never holds a database connection."""
+    db = SessionLocal()
+    try:
+        user = get_user_from_token(token, db)
+        if delivery_id is not None:
+            delivery = db.query(models.DeliveryRequest).filter(models.DeliveryRequest.id == delivery_id).first()
+            if not delivery:
+                raise HTTPException(status_code=404, detail="Delivery not found")
+            if delivery.user_id != user.id and user.role != "admin":
+                raise HTTPException(status_code=403, detail="Not authorized to view this delivery")
+        return user
+    finally:
+        db.close()
+
+
+def _snapshot(user, delivery_id: int | None):
+    db = SessionLocal()
+    try:
+        query = db.query(models.DeliveryRequest)
+        if delivery_id is not None:
+            query = query.filter(models.DeliveryRequest.id == delivery_id)
+        else:
+            query = query.filter(models.DeliveryRequest.user_id == user.id)
+        return [delivery_event(d) for d in query.all()]
+    finally:
+        db.close()
+
+
+def _subscribe(user, delivery_id: int | None):
+    if delivery_id is not None:
+        return tracking_hub.subscribe(delivery_ids=[delivery_id])
+    return tracking_hub.subscribe(user_id=user.id)
+
+
+async def _open(user, delivery_id: int | None):
+    """Subscribes, then reads the snapshot.
+
+    An update committed between the two is then seen twice at worst; the other
+    way round it would be missing until the next one.
+    """
+    subscription = _subscribe(user, delivery_id)
+    try:
+        snapshot = await run_in_threadpool(_snapshot, user, delivery_id)
+    except BaseException:
+        tracking_hub.unsubscribe(subscription)
+        raise
+    return subscription, snapshot
+
+
+def _token_from_request(request: Request, token: str | None):
+    # EventSource cannot set headers, so ?token= is accepted as well as Authorization
+    if token:
+        return token
+    scheme, credentials = get_authorization_scheme_param(request.headers.get("Authorization"))
+    if scheme.lower() != "bearer" or not credentials:
+        raise HTTPException(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+    return credentials
+
+
+async def _event_stream(request: Request, subscription, snapshot):
+    try:
+        for event in snapshot:
+            yield f"data: {json.dumps(event)}\n\n"
+        while True:
+            try:
+                event = await subscription.get(HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": ping\n\n"
+                continue
+            yield f"data: {json.dumps(event)}\n\n"
+    finally:
+        tracking_hub.unsubscribe(subscription)
+
+
+def _sse_response(request: Request, subscription, snapshot):
+    return StreamingResponse(
+        _event_stream(request, subscription, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# 📡 Server-Sent Events for one delivery
+@router.get("/deliveries/{delivery_id}/events")
+async def stream_delivery(delivery_id: int, request: Request, token: str | None = None):
+    user = await run_in_threadpool(_authorize, _token_from_request(request, token), delivery_id)
+    subscription, snapshot = await _open(user, delivery_id)
+    return _sse_response(request, subscription, snapshot)
+
+
+# 📡 Server-Sent Events for all of the current user's deliveries
+@router.get("/events")
+async def stream_my_deliveries(request: Request, token: str | None = None):
+    user = await run_in_threadpool(_authorize, _token_from_request(request, token), None)
+    subscription, snapshot = await _open(user, None)
+    return _sse_response(request, subscription, snapshot)
+
+
+# 🔌 WebSocket: /tracking/ws?token=...[&delivery_id=...]
+@router.websocket("/ws")
+async def tracking_websocket(websocket: WebSocket, token: str, delivery_id: int | None = None):
+    try:
+        user = await run_in_threadpool(_authorize, token, delivery_id)
+    except HTTPException as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e.detail))
+        return
+
+    await websocket.accept()
+    subscription = _subscribe(user, delivery_id)
+    try:
+        # Read after subscribing, as in _open()
+        for event in await run_in_threadpool(_snapshot, user, delivery_id):
+            await websocket.send_json(event)
+        while True:
+            try:
+                event = await subscription.get(HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "ping"})
+                continue
+            await websocket.send_json(event)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        tracking_hub.unsubscribe(subscription)
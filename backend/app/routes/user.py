@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.dependencies import get_current_user, get_current_admin_user
+from app.dependencies import get_current_user, get_current_admin_user, invalidate_principal
 from app import models, schemas, crud
 from app.database import get_db
+from app.pagination import PageParams, paginate
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -14,13 +15,14 @@ def read_profile(current_user: models.User = Depends(get_current_user)):
 @router.get("/", response_model=list[schemas.UserOut])
 def get_all_users(
     role: str = None,  # ✅ allow ?role=user query param
+    page: PageParams = Depends(),
     db: Session = Depends(get_db),
     current_admin: models.User = Depends(get_current_admin_user)
 ):
     query = db.query(models.User)
     if role:
         query = query.filter(models.User.role == role)  # ✅ filter users by role
-    return query.all()
+    return paginate(query, (models.User.id,), page)
 
 
 # 2. Search users by email
@@ -45,8 +47,15 @@ def delete_user(
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    email = user.email
+    reviewed = [product_id for (product_id,) in
+                db.query(models.ProductReview.product_id).filter(models.ProductReview.user_id == user_id)]
     db.delete(user)
     db.commit()
+    invalidate_principal(email)
+    if reviewed:
+        # The user's reviews were cascade-deleted with them
+        crud.repair_rating_aggregates(db, reviewed)
     return {"message": "User deleted successfully"}
 
 # 4. Update user role
@@ -60,8 +69,10 @@ def update_user_role(
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    email = user.email
     user.role = role
     db.commit()
+    invalidate_principal(email)
     return {"message": "User role updated successfully"}
 
 @router.put("/{user_id}/reset-password")
@@ -76,8 +87,10 @@ def reset_user_password(
         raise HTTPException(status_code=404, detail="User not found")
     
     from app.auth import get_password_hash
+    email = user.email
     user.hashed_password = get_password_hash(new_password)
     db.commit()
+    invalidate_principal(email)
     return {"message": "Password reset successfully"}
 
 from app.dependencies import get_current_user  # ✅ Import the regular user dependency
@@ -100,6 +113,7 @@ def update_user_info(
     if current_user.id != user_id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="You are not authorized to update this profile")
 
+    old_email = user.email
     if user_update.username:
         user.username = user_update.username
     if user_update.email:
@@ -107,5 +121,6 @@ def update_user_info(
 
     db.commit()
     db.refresh(user)
+    invalidate_principal(old_email)
     return {"message": "User updated successfully"}
 
@@ -0,0 +1,214 @@
+# app/routing.py
+from time import monotonic
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+HQ_COORDS = (4.0749865, 11.5525917)  # HQ in Yaoundé
+DEFAULT_TIME_BUDGET = 1.0  # seconds spent improving a tour after nearest neighbour
+
+
+def haversine_matrix(coords) -> np.ndarray:
+    """Full pairwise great-circle distance matrix (km) for an (n, 2) array of lat/lng in degrees."""
+    points = np.radians(np.asarray(coords, dtype=float))
+    lat = points[:, 0][:, None]
+    lng = points[:, 1][:, None]
+    dlat = lat.T - lat
+    dlng = lng.T - lng
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def tour_length(tour, dist: np.ndarray) -> float:
+    tour = np.asarray(tour)
+    return float(dist[tour[:-1], tour[1:]].sum())
+
+
+def path_length_km(coords) -> float:
+    """Length of the polyline through coords, without building a matrix."""
+    points = np.radians(np.asarray(coords, dtype=float))
+    if len(points) < 2:
+        return 0.0
+    lat1, lng1 = points[:-1, 0], points[:-1, 1]
+    lat2, lng2 = points[1:, 0], points[1:, 1]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return float((2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))).sum())
+
+
+def nearest_neighbour_tour(dist: np.ndarray, start: int = 0) -> np.ndarray:
+    n = len(dist)
+    visited = np.zeros(n, dtype=bool)
+    tour = np.empty(n, dtype=int)
+    current = start
+    for k in range(n):
+        tour[k] = current
+        visited[current] = True
+        if k == n - 1:
+            break
+        row = np.where(visited, np.inf, dist[current])
+        current = int(np.argmin(row))
+    return tour
+
+
+def two_opt(tour: np.ndarray, dist: np.ndarray, deadline: float) -> np.ndarray:
+    """2-opt on an open path; tour[0] (the depot) stays fixed."""
+    tour = tour.copy()
+    n = len(tour)
+    improved = True
+    while improved and monotonic() < deadline:
+        improved = False
+        for i in range(1, n - 1):
+            a, b = tour[i - 1], tour[i]
+            ends = tour[i + 1:]                 # candidate segment ends tour[j]
+            after = np.append(tour[i + 2:], -1)  # tour[j + 1], -1 past the end of the path
+            has_after = after >= 0
+            after_idx = np.where(has_after, after, 0)
+            delta = dist[a, ends] - dist[a, b] \
+                + np.where(has_after, dist[b, after_idx] - dist[ends, after_idx], 0.0)
+            j = int(np.argmin(delta))
+            if delta[j] < -1e-9:
+                j += i + 1
+                tour[i:j + 1] = tour[i:j + 1][::-1]
+                improved = True
+            if monotonic() >= deadline:
+                break
+    return tour
+
+
+def or_opt(tour: np.ndarray, dist: np.ndarray, deadline: float, max_segment: int = 3) -> np.ndarray:
+    """Relocates segments of 1..max_segment stops (either orientation) to their cheapest position."""
+    tour = tour.copy()
+    n = len(tour)
+    improved = True
+    while improved and monotonic() < deadline:
+        improved = False
+        for length in range(1, max_segment + 1):
+            i = 1
+            while i + length <= n:
+                segment = tour[i:i + length]
+                first, last = segment[0], segment[-1]
+                prev = tour[i - 1]
+                nxt = tour[i + length] if i + length < n else None
+                if nxt is None:
+                    gain = dist[prev, first]
+                else:
+                    gain = dist[prev, first] + dist[last, nxt] - dist[prev, nxt]
+
+                rest = np.concatenate((tour[:i], tour[i + length:]))
+                left, right = rest[:-1], rest[1:]
+                # Insert between left[k] and right[k], or append after the last stop
+                forward = np.append(dist[left, first] + dist[last, right] - dist[left, right], dist[rest[-1], first])
+                backward = np.append(dist[left, last] + dist[first, right] - dist[left, right], dist[rest[-1], last])
+                forward[i - 1] = backward[i - 1] = np.inf  # that is where the segment came from
+
+                k_f, k_b = int(np.argmin(forward)), int(np.argmin(backward))
+                if forward[k_f] <= backward[k_b]:
+                    k, cost, piece = k_f, forward[k_f], segment
+                else:
+                    k, cost, piece = k_b, backward[k_b], segment[::-1]
+
+                if cost < gain - 1e-9:
+                    tour = np.concatenate((rest[:k + 1], piece, rest[k + 1:]))
+                    improved = True
+                i += 1
+                if monotonic() >= deadline:
+                    return tour
+    return tour
+
+
+def solve_path(coords, time_budget: float = DEFAULT_TIME_BUDGET) -> np.ndarray:
+    """Visiting order for coords[1:] starting from coords[0]; returned indices exclude the depot."""
+    deadline = monotonic() + time_budget
+    dist = haversine_matrix(coords)
+    tour = nearest_neighbour_tour(dist)
+    if len(tour) > 3:
+        tour = two_opt(tour, dist, deadline)
+        tour = or_opt(tour, dist, deadline)
+    return tour[1:]
+
+
+def optimize_route(deliveries, start=HQ_COORDS, time_budget: float = DEFAULT_TIME_BUDGET):
+    """Matrix-based replacement for crud.optimize_delivery_route."""
+    if not deliveries:
+        return []
+    coords = [start] + [(d.latitude, d.longitude) for d in deliveries]
+    order = solve_path(coords, time_budget)
+    return [deliveries[i - 1] for i in order]
+
+
+def sweep_clusters(coords, demands, capacities, start=HQ_COORDS):
+    """Capacitated sweep: orders stops by bearing from the depot and fills one vehicle after another.
+
+    Returns (clusters, unassigned), clusters[v] being indices into coords.
+    """
+    coords = np.asarray(coords, dtype=float)
+    demands = np.asarray(demands, dtype=float)
+    capacities = np.asarray(capacities, dtype=float)
+    clusters = [[] for _ in capacities]
+    loads = np.zeros(len(capacities))
+    if len(coords) == 0 or len(capacities) == 0:
+        return clusters, list(range(len(coords)))
+
+    angles = np.arctan2(coords[:, 0] - start[0], coords[:, 1] - start[1])
+    order = np.argsort(angles, kind="stable")
+    # Start the sweep at the widest angular gap so no cluster straddles it
+    sorted_angles = angles[order]
+    gaps = np.diff(np.append(sorted_angles, sorted_angles[0] + 2 * np.pi))
+    order = np.roll(order, -((int(np.argmax(gaps)) + 1) % len(order)))
+
+    v = 0
+    leftovers = []
+    for idx in order:
+        q = demands[idx]
+        if v < len(capacities) and loads[v] + q > capacities[v]:
+            v += 1  # current vehicle is full, sweep on to the next one
+        if v < len(capacities) and loads[v] + q <= capacities[v]:
+            clusters[v].append(int(idx))
+            loads[v] += q
+        else:
+            leftovers.append(int(idx))
+
+    # Best fit whatever the sweep skipped into the space left on any vehicle
+    unassigned = []
+    for idx in leftovers:
+        slack = capacities - loads - demands[idx]
+        slack[slack < 0] = np.inf
+        v = int(np.argmin(slack))
+        if np.isfinite(slack[v]):
+            clusters[v].append(idx)
+            loads[v] += demands[idx]
+        else:
+            unassigned.append(idx)
+    return clusters, unassigned
+
+
+def plan_routes(deliveries, drivers, start=HQ_COORDS, time_limit: float = 5.0):
+    """Cluster first, route second: splits deliveries across drivers under vehicle capacity.
+
+    Returns (routes, unassigned) where routes is a list of dicts with the driver,
+    its load, route length in km and the ordered deliveries.
+    """
+    deadline = monotonic() + time_limit
+    coords = [(d.latitude, d.longitude) for d in deliveries]
+    demands = [d.quantity or 0 for d in deliveries]
+    capacities = [driver.capacity or 0 for driver in drivers]
+    clusters, unassigned = sweep_clusters(coords, demands, capacities, start)
+
+    routes = []
+    total = sum(len(c) for c in clusters) or 1
+    for driver, cluster in zip(drivers, clusters):
+        if not cluster:
+            continue
+        # Each cluster gets a share of the remaining time proportional to its size
+        budget = max(0.0, deadline - monotonic()) * len(cluster) / total
+        total -= len(cluster)
+        stops = [start] + [coords[i] for i in cluster]
+        order = solve_path(stops, budget)
+        distance = path_length_km([start] + [coords[cluster[i - 1]] for i in order])
+        routes.append({
+            "driver": driver,
+            "load": int(sum(demands[i] for i in cluster)),
+            "distance_km": round(distance, 3),
+            "deliveries": [deliveries[cluster[i - 1]] for i in order],
+        })
+    return routes, [deliveries[i] for i in unassigned]
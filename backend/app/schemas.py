@@ -1,6 +1,6 @@
 # app/schemas.py
 from datetime import datetime
-from pydantic import BaseModel, EmailStr, conint
+from pydantic import BaseModel, EmailStr, confloat, conint
 from typing import Optional
 from enum import Enum
 
@@ -70,6 +70,8 @@ class ProductUpdate(BaseModel):
 class ProductOut(ProductBase):
     id: int
     quantity: int
+    review_count: Optional[int] = 0
+    average_rating: Optional[float] = 0.0
     created_at: datetime
     updated_at: datetime
 
@@ -83,12 +85,14 @@ class DriverCreate(BaseModel):
     name: str
     phone: str
     vehicle: Optional[str]
+    capacity: int = 100
 
 class DriverOut(BaseModel):
     id: int
     name: str
     phone: str
     vehicle: Optional[str]
+    capacity: Optional[int] = None
 
     class Config:
         from_attributes = True
@@ -130,14 +134,32 @@ class DeliveryRequestOut(BaseModel):
     created_at: datetime
     latitude: Optional[float]
     longitude: Optional[float]
+    current_latitude: Optional[float] = None
+    current_longitude: Optional[float] = None
     estimated_delivery_time: Optional[str]
 
 
     class Config:
         from_attributes = True
 
+class DriverRouteOut(BaseModel):
+    driver: DriverOut
+    load: int
+    distance_km: float
+    deliveries: list[DeliveryRequestOut]
+
+class RoutePlanOut(BaseModel):
+    routes: list[DriverRouteOut]
+    unassigned: list[DeliveryRequestOut]
+
 class UnlockRequest(BaseModel):
     delivery_id: int
+
+class SimulationStart(BaseModel):
+    delivery_ids: Optional[list[int]] = None  # None = every undelivered delivery with coordinates
+    limit: Optional[conint(ge=1)] = None
+    tick_seconds: Optional[confloat(gt=0)] = None
+    speed_factor: Optional[confloat(gt=0)] = None
     
 # Reviews
 
@@ -0,0 +1,101 @@
+# app/search.py
+import re
+
+from sqlalchemy import Column, Integer, MetaData, Table, func, literal_column, text
+
+from . import models
+
+# Kept out of Base.metadata: create_all() must not try to create the virtual table
+_fts_metadata = MetaData()
+products_fts = Table(
+    "products_fts", _fts_metadata,
+    Column("rowid", Integer, primary_key=True),
+)
+
+SQLITE_FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description,
+        content='products', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    # External content table: these triggers keep the index in step with products
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO products_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+    END""",
+]
+
+POSTGRES_FTS_DDL = [
+    """CREATE INDEX IF NOT EXISTS ix_products_search ON products
+        USING GIN (to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, '')))""",
+]
+
+
+def setup_product_search(engine):
+    """Creates the full-text index for products if missing; called once at startup."""
+    with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            existed = conn.execute(text(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'"
+            )).first()
+            for ddl in SQLITE_FTS_DDL:
+                conn.execute(text(ddl))
+            if not existed:
+                # Index rows that were inserted before the triggers existed
+                conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+        elif engine.dialect.name == "postgresql":
+            for ddl in POSTGRES_FTS_DDL:
+                conn.execute(text(ddl))
+
+
+def product_document():
+    """The tsvector expression of ix_products_search, written out with literals.
+
+    Postgres matches expression indexes structurally, so bound parameters in
+    place of 'simple', '' and ' ' would not match the index and every search
+    would scan the table.
+    """
+    return func.to_tsvector(
+        literal_column("'simple'"),
+        func.coalesce(models.Product.name, literal_column("''")) + literal_column("' '")
+        + func.coalesce(models.Product.description, literal_column("''")),
+    )
+
+
+def search_terms(search: str):
+    return re.findall(r"\w+", search.lower())
+
+
+def apply_product_search(query, search: str, dialect: str):
+    """Filters a Product query to full-text matches, best matches first.
+
+    Every term is prefix matched so the storefront can search as the user types.
+    """
+    terms = search_terms(search)
+    if not terms:
+        return query
+
+    if dialect == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        return query.join(products_fts, products_fts.c.rowid == models.Product.id)\
+            .filter(text("products_fts MATCH :fts_query").bindparams(fts_query=match))\
+            .order_by(literal_column("products_fts.rank"), models.Product.id)
+
+    if dialect == "postgresql":
+        document = product_document()
+        tsquery = func.to_tsquery(literal_column("'simple'"), " & ".join(f"{term}:*" for term in terms))
+        return query.filter(document.op("@@")(tsquery))\
+            .order_by(func.ts_rank(document, tsquery).desc(), models.Product.id)
+
+    # No full-text support on this backend: substring match on every term
+    for term in terms:
+        query = query.filter(
+            models.Product.name.ilike(f"%{term}%") | models.Product.description.ilike(f"%{term}%")
+        )
+    return query.order_by(models.Product.id)
@@ -0,0 +1,257 @@
+# app/simulation.py
+import os
+import random
+import threading
+from datetime import datetime
+from time import monotonic
+
+from sqlalchemy import update
+
+from . import models
+from .crud import WAREHOUSE_COORDS, haversine_distance_km
+from .database import SessionLocal
+from .rollups import record_stage_changes
+from .tracking import tracking_hub
+
+SIMULATION_TICK_SECONDS = float(os.getenv("SIMULATION_TICK_SECONDS", "1.0"))
+SIMULATION_SPEED_FACTOR = float(os.getenv("SIMULATION_SPEED_FACTOR", "1.0"))  # >1 fast-forwards the trip
+MIN_SPEED_KMH = 20
+MAX_SPEED_KMH = 40
+ROAD_BENDS = 3             # intermediate waypoints between warehouse and customer
+ROAD_DEVIATION = 0.15      # max sideways offset of a bend, as a fraction of the trip length
+GPS_NOISE_DEGREES = 0.00005  # ~5 m of receiver jitter on reported positions
+
+
+def road_path(start, end, bends=ROAD_BENDS, deviation=ROAD_DEVIATION, rng=random):
+    """A plausible road-like polyline: the straight line with a few sideways bends."""
+    (lat1, lng1), (lat2, lng2) = start, end
+    d_lat, d_lng = lat2 - lat1, lng2 - lng1
+    points = [start]
+    for i in range(1, bends + 1):
+        t = i / (bends + 1)
+        offset = rng.uniform(-deviation, deviation)
+        # Perpendicular to the direction of travel
+        points.append((lat1 + d_lat * t - d_lng * offset, lng1 + d_lng * t + d_lat * offset))
+    points.append(end)
+    return points
+
+
+class SimulatedTrip:
+    __slots__ = ("delivery_id", "user_id", "path", "cumulative", "length_km", "speed_kmh",
+                 "travelled_km", "started")
+
+    def __init__(self, delivery_id, user_id, destination, start=WAREHOUSE_COORDS, rng=random):
+        self.delivery_id = delivery_id
+        self.user_id = user_id
+        self.path = road_path(start, destination, rng=rng)
+        self.cumulative = [0.0]
+        for (a_lat, a_lng), (b_lat, b_lng) in zip(self.path, self.path[1:]):
+            self.cumulative.append(self.cumulative[-1] + haversine_distance_km(a_lat, a_lng, b_lat, b_lng))
+        self.length_km = self.cumulative[-1]
+        self.speed_kmh = rng.uniform(MIN_SPEED_KMH, MAX_SPEED_KMH)
+        self.travelled_km = 0.0
+        self.started = False
+
+    @property
+    def arrived(self):
+        return self.travelled_km >= self.length_km
+
+    def advance(self, seconds: float):
+        self.travelled_km = min(self.length_km, self.travelled_km + self.speed_kmh * seconds / 3600)
+
+    def position(self, rng=random):
+        if self.arrived:
+            return self.path[-1]
+        # Locate the segment we are on and interpolate along it
+        i = 1
+        while self.cumulative[i] < self.travelled_km:
+            i += 1
+        seg = self.cumulative[i] - self.cumulative[i - 1]
+        t = (self.travelled_km - self.cumulative[i - 1]) / seg if seg else 1.0
+        (a_lat, a_lng), (b_lat, b_lng) = self.path[i - 1], self.path[i]
+        return (
+            a_lat + (b_lat - a_lat) * t + rng.uniform(-GPS_NOISE_DEGREES, GPS_NOISE_DEGREES),
+            a_lng + (b_lng - a_lng) * t + rng.uniform(-GPS_NOISE_DEGREES, GPS_NOISE_DEGREES),
+        )
+
+
+class SimulationEngine:
+    """Drives simulated deliveries from the warehouse to the customer.
+
+    One scheduler thread advances every active trip per tick and writes all
+    positions and stage changes in a single transaction, then pushes them to
+    the tracking hub. Cost per tick grows with the number of trips, not with
+    the number of threads or sessions.
+    """
+
+    def __init__(self, tick_seconds=SIMULATION_TICK_SECONDS, speed_factor=SIMULATION_SPEED_FACTOR,
+                 session_factory=SessionLocal, hub=tracking_hub):
+        self.tick_seconds = tick_seconds
+        self.speed_factor = speed_factor
+        self.session_factory = session_factory
+        self.hub = hub
+        self._trips = {}  # delivery_id -> SimulatedTrip
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._running = False
+        self.ticks = 0
+        self.completed = 0
+        self.last_tick_ms = 0.0
+        self.overruns = 0
+
+    def configure(self, tick_seconds: float | None = None, speed_factor: float | None = None):
+        if tick_seconds is not None:
+            self.tick_seconds = tick_seconds
+        if speed_factor is not None:
+            self.speed_factor = speed_factor
+
+    def add(self, delivery_ids=None, limit: int | None = None) -> int:
+        """Starts trips for the given deliveries, or for every undelivered geocoded one.
+
+        Deliveries already on the road are skipped. Returns how many trips were added.
+        """
+        db = self.session_factory()
+        try:
+            query = db.query(
+                models.DeliveryRequest.id, models.DeliveryRequest.user_id,
+                models.DeliveryRequest.latitude, models.DeliveryRequest.longitude,
+            ).filter(
+                models.DeliveryRequest.latitude.isnot(None),
+                models.DeliveryRequest.longitude.isnot(None),
+                models.DeliveryRequest.stage != models.DeliveryStage.delivered,
+            )
+            if delivery_ids is not None:
+                query = query.filter(models.DeliveryRequest.id.in_(delivery_ids))
+            query = query.order_by(models.DeliveryRequest.id)
+            if limit is not None:
+                query = query.limit(limit)
+            rows = query.all()
+        finally:
+            db.close()
+
+        added = 0
+        with self._lock:
+            for delivery_id, user_id, lat, lng in rows:
+                if delivery_id not in self._trips:
+                    self._trips[delivery_id] = SimulatedTrip(delivery_id, user_id, (lat, lng))
+                    added += 1
+        if added:
+            self.start()
+        return added
+
+    def cancel(self, delivery_ids=None) -> int:
+        with self._lock:
+            if delivery_ids is None:
+                cancelled = len(self._trips)
+                self._trips.clear()
+            else:
+                cancelled = sum(self._trips.pop(i, None) is not None for i in delivery_ids)
+        return cancelled
+
+    def active(self) -> int:
+        with self._lock:
+            return len(self._trips)
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._running = True
+            self._wake.clear()
+            self._thread = threading.Thread(target=self._run, name="delivery-simulation", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._running = False
+        self._wake.set()
+        thread = self._thread
+        if thread:
+            thread.join(timeout)
+
+    def _run(self):
+        last = monotonic()
+        while self._running:
+            started = monotonic()
+            try:
+                self.tick(started - last)
+            except Exception as e:
+                print("❌ Simulation tick failed:", str(e))
+            last = started
+            elapsed = monotonic() - started
+            self.last_tick_ms = elapsed * 1000
+            if elapsed > self.tick_seconds:
+                self.overruns += 1  # running late: start the next tick straight away
+            with self._lock:
+                if not self._trips:
+                    # Idle: exit under the lock so a concurrent add() starts a fresh thread
+                    self._thread = None
+                    return
+            self._wake.wait(max(0.0, self.tick_seconds - elapsed))
+
+    def tick(self, elapsed_seconds: float | None = None):
+        """Advances every trip by one tick and persists the result in one transaction."""
+        seconds = (self.tick_seconds if elapsed_seconds is None else elapsed_seconds) * self.speed_factor
+        now = datetime.utcnow()
+        rows, events, finished = [], [], []
+        with self._lock:
+            trips = list(self._trips.values())
+        for trip in trips:
+            row = {"id": trip.delivery_id, "updated_at": now}
+            if not trip.started:
+                trip.started = True
+                row["stage"] = models.DeliveryStage.out_for_delivery
+            else:
+                trip.advance(seconds)
+            row["current_latitude"], row["current_longitude"] = trip.position()
+            if trip.arrived:
+                row["stage"] = models.DeliveryStage.delivered
+                finished.append(trip.delivery_id)
+            rows.append(row)
+            events.append((trip, row))
+
+        if not rows:
+            return 0
+
+        db = self.session_factory()
+        try:
+            record_stage_changes(db, {row["id"]: row["stage"] for row in rows if "stage" in row})
+            # ORM bulk UPDATE by primary key: one executemany for the whole tick
+            db.execute(update(models.DeliveryRequest), rows)
+            db.commit()
+        finally:
+            db.close()
+
+        with self._lock:
+            for delivery_id in finished:
+                self._trips.pop(delivery_id, None)
+        self.completed += len(finished)
+        self.ticks += 1
+
+        for trip, row in events:
+            stage = row.get("stage")
+            self.hub.publish({
+                "delivery_id": trip.delivery_id,
+                "user_id": trip.user_id,
+                "stage": stage.value if stage else models.DeliveryStage.out_for_delivery.value,
+                "current_latitude": row["current_latitude"],
+                "current_longitude": row["current_longitude"],
+                "progress": round(trip.travelled_km / trip.length_km, 4) if trip.length_km else 1.0,
+                "updated_at": now.isoformat(),
+            })
+        return len(rows)
+
+    def stats(self):
+        return {
+            "active": self.active(),
+            "running": self._thread is not None,
+            "tick_seconds": self.tick_seconds,
+            "speed_factor": self.speed_factor,
+            "ticks": self.ticks,
+            "completed": self.completed,
+            "last_tick_ms": round(self.last_tick_ms, 2),
+            "overruns": self.overruns,
+        }
+
+
+simulation_engine = SimulationEngine()
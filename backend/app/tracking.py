@@ -0,0 +1,122 @@
+# app/tracking.py
+import asyncio
+import threading
+from datetime import datetime
+
+SUBSCRIBER_BUFFER_SIZE = 16  # per subscriber; the oldest update is dropped when full
+
+
+class Subscription:
+    def __init__(self, delivery_ids=None, user_id=None, buffer_size=SUBSCRIBER_BUFFER_SIZE):
+        self.delivery_ids = set(delivery_ids or ())
+        self.user_id = user_id
+        self.queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+
+    def offer(self, event: dict):
+        # A slow client only ever sees the latest positions, it never blocks publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: float):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class TrackingHub:
+    """In-process pub/sub for delivery stage and position updates.
+
+    Subscribers live on the event loop; publishers may be request threads, the
+    simulation engine or the geocoding worker, so dispatch is always handed to
+    the loop thread.
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._by_delivery = {}  # delivery_id -> set of Subscription
+        self._by_user = {}      # user_id -> set of Subscription
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def bind(self, loop):
+        self._loop = loop
+
+    def subscribe(self, delivery_ids=None, user_id=None) -> Subscription:
+        subscription = Subscription(delivery_ids, user_id)
+        with self._lock:
+            for delivery_id in subscription.delivery_ids:
+                self._by_delivery.setdefault(delivery_id, set()).add(subscription)
+            if user_id is not None:
+                self._by_user.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            for delivery_id in subscription.delivery_ids:
+                subscribers = self._by_delivery.get(delivery_id)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_delivery[delivery_id]
+            if subscription.user_id is not None:
+                subscribers = self._by_user.get(subscription.user_id)
+                if subscribers:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._by_user[subscription.user_id]
+
+    def publish(self, event: dict):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        with self._lock:
+            if event["delivery_id"] not in self._by_delivery and event.get("user_id") not in self._by_user:
+                return  # nobody is listening, skip the hop to the loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(event)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event: dict):
+        with self._lock:
+            targets = set(self._by_delivery.get(event["delivery_id"], ()))
+            targets.update(self._by_user.get(event.get("user_id"), ()))
+        for subscription in targets:
+            subscription.offer(event)
+        self.published += 1
+
+    def stats(self):
+        with self._lock:
+            subscriptions = set().union(*self._by_delivery.values(), *self._by_user.values())
+        return {
+            "subscribers": len(subscriptions),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in subscriptions),
+        }
+
+
+def delivery_event(delivery) -> dict:
+    updated_at = delivery.updated_at or datetime.utcnow()
+    return {
+        "delivery_id": delivery.id,
+        "user_id": delivery.user_id,
+        "status": getattr(delivery.status, "value", delivery.status),
+        "stage": getattr(delivery.stage, "value", delivery.stage),
+        "latitude": delivery.latitude,
+        "longitude": delivery.longitude,
+        "current_latitude": delivery.current_latitude,
+        "current_longitude": delivery.current_longitude,
+        "updated_at": updated_at.isoformat(),
+    }
+
+
+def publish_delivery(delivery):
+    tracking_hub.publish(delivery_event(delivery))
+
+
+tracking_hub = TrackingHub()
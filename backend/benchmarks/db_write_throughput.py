@@ -0,0 +1,132 @@
+"""Concurrent write throughput for each database engine profile.
+
+Run from the backend folder:
+
+    python -m benchmarks.db_write_throughput
+    python -m benchmarks.db_write_throughput --threads 32 --writes 200 --readers 4
+    python -m benchmarks.db_write_throughput --url postgresql://user:pw@localhost/aquaflow_bench
+
+Every writer thread behaves like a request handler: open a session, insert a
+notification, commit, close. Reader threads run list queries at the same
+time. SQLite is measured on a scratch file twice, once with SQLAlchemy's
+defaults and once with the tuned profile from app.database. Pass --url to
+also measure a Postgres server; use a scratch database, tables are created
+in it.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+from time import perf_counter
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import Base, build_engine
+
+
+def run(engine, threads: int, writes: int, readers: int):
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    with Session() as db:
+        user = models.User(username=f"bench-{os.getpid()}-{id(engine)}", email=f"bench-{id(engine)}@example.com",
+                           hashed_password="x", role="user")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+
+    latencies, errors, reads = [], [0], [0]
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def writer():
+        mine, failed = [], 0
+        for i in range(writes):
+            started = perf_counter()
+            db = Session()
+            try:
+                db.add(models.Notification(user_id=user_id, message=f"benchmark {i}"))
+                db.commit()
+                mine.append(perf_counter() - started)
+            except OperationalError:
+                db.rollback()
+                failed += 1  # "database is locked" and friends
+            finally:
+                db.close()
+        with lock:
+            latencies.extend(mine)
+            errors[0] += failed
+
+    def reader():
+        count = 0
+        while not done.is_set():
+            db = Session()
+            try:
+                db.query(models.Notification.id).filter(models.Notification.user_id == user_id)\
+                    .order_by(models.Notification.id.desc()).limit(50).all()
+                count += 1
+            except OperationalError:
+                db.rollback()
+            finally:
+                db.close()
+        with lock:
+            reads[0] += count
+
+    workers = [threading.Thread(target=writer) for _ in range(threads)]
+    background = [threading.Thread(target=reader) for _ in range(readers)]
+    started = perf_counter()
+    for t in background + workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = perf_counter() - started
+    done.set()
+    for t in background:
+        t.join()
+
+    with Session() as db:
+        stored = db.query(func.count(models.Notification.id)).filter(models.Notification.user_id == user_id).scalar()
+    engine.dispose()
+
+    latencies.sort()
+    return {
+        "writes_per_s": round(len(latencies) / elapsed, 1),
+        "reads_per_s": round(reads[0] / elapsed, 1),
+        "failed_writes": errors[0],
+        "stored": stored,
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else None,
+        "seconds": round(elapsed, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.db_write_throughput")
+    parser.add_argument("--threads", type=int, default=16, help="concurrent writer threads")
+    parser.add_argument("--writes", type=int, default=100, help="committed inserts per writer")
+    parser.add_argument("--readers", type=int, default=2, help="concurrent reader threads")
+    parser.add_argument("--url", help="also benchmark this database URL (e.g. Postgres) with its profile")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        profiles = [
+            # Pre-change behaviour: rollback journal, FULL sync, pysqlite's 5 s lock wait
+            ("sqlite (defaults)", create_engine(f"sqlite:///{tmp}/default.db", connect_args={"check_same_thread": False})),
+            ("sqlite (tuned profile)", build_engine(f"sqlite:///{tmp}/tuned.db")),
+        ]
+        if args.url:
+            profiles.append((f"{args.url.split(':', 1)[0]} (pooled profile)", build_engine(args.url)))
+
+        print(f"{args.threads} writers x {args.writes} commits, {args.readers} readers\n")
+        print(f"{'profile':<28}{'writes/s':>10}{'reads/s':>10}{'failed':>8}{'p50 ms':>9}{'p95 ms':>9}")
+        for name, engine in profiles:
+            result = run(engine, args.threads, args.writes, args.readers)
+            print(f"{name:<28}{result['writes_per_s']:>10}{result['reads_per_s']:>10}{result['failed_writes']:>8}"
+                  f"{result['p50_ms']:>9}{result['p95_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
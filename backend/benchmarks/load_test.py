@@ -0,0 +1,293 @@
+"""In-process load test of the real FastAPI app.
+
+Run from the backend folder, against a database made by benchmarks.seed_data:
+
+    python -m benchmarks.load_test --db bench.db
+    python -m benchmarks.load_test --db bench.db --scenarios browse,cart --users 32 --iterations 50
+    python -m benchmarks.load_test --db bench.db --baseline benchmarks/results/before.json --max-regression 15
+
+Each scenario in benchmarks/scenarios.py runs on its own: --users virtual
+users log in, do one untimed warm-up iteration, then run --iterations
+timed iterations at the same time. Requests go through httpx's ASGI
+transport, so routing, dependencies, the database, serialization and the
+middleware all run. Only the network is left out.
+
+For each scenario and step the run reports throughput and p50/p95/p99
+latency. Results are written as JSON (default benchmarks/results/) and,
+with --baseline, compared against an earlier run. A SQLite --db is copied
+to a scratch file first, so every run starts from the same seeded data.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.seed_data import ADMIN_EMAIL, BENCH_PASSWORD
+
+RESULTS_DIR = Path(__file__).parent / "results"
+USER_POOL = 1_000
+ADDRESS_POOL = 1_000
+COUNTED_TABLES = ["users", "products", "product_reviews", "user_bookmarks", "cart_items",
+                  "notifications", "drivers", "delivery_requests"]
+
+
+class Dataset:
+    """What the scenarios need to know about the seeded database."""
+
+    def __init__(self, db):
+        from sqlalchemy import func
+        from app import models
+
+        self.users = [email for email, in db.query(models.User.email)
+                      .filter(models.User.role == "user", models.User.is_active == True)
+                      .order_by(models.User.id).limit(USER_POOL)]
+        self.product_ids = [pid for pid, in db.query(models.Product.id).order_by(models.Product.id)]
+        self.categories = sorted({c for c, in db.query(models.Product.category).distinct() if c})
+        names = [name for name, in db.query(models.Product.name).order_by(models.Product.id).limit(200)]
+        self.search_terms = sorted({name.split()[0].lower() for name in names}) or ["water"]
+        self.addresses = [key for key, in db.query(models.GeocodeCacheEntry.address_key)
+                          .filter(models.GeocodeCacheEntry.found == True)
+                          .order_by(models.GeocodeCacheEntry.address_key).limit(ADDRESS_POOL)]
+        latest = db.query(func.max(models.DeliveryRequest.created_at)).scalar() or datetime.utcnow()
+        self.anchor = latest.date().isoformat()
+        if not (self.users and self.product_ids and self.addresses):
+            raise SystemExit("Database has no benchmark data; create it with python -m benchmarks.seed_data")
+
+
+class VirtualUser:
+    def __init__(self, client, data: Dataset, email: str, password: str, rng: random.Random):
+        self.client = client
+        self.data = data
+        self.email = email
+        self.password = password
+        self.rng = rng
+        self.headers = {}
+        self.samples = []  # (step, seconds, ok)
+        self.recording = False
+
+    def product(self) -> int:
+        return self.rng.choice(self.data.product_ids)
+
+    async def authenticate(self):
+        response = await self.client.post("/login", data={"username": self.email, "password": self.password})
+        if response.status_code != 200:
+            raise SystemExit(f"Login failed for {self.email}: {response.status_code} {response.text}")
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def call(self, step: str, method: str, url: str, auth: bool = True, expect=(200,), **kwargs):
+        started = perf_counter()
+        response = await self.client.request(method, url, headers=self.headers if auth else None, **kwargs)
+        elapsed = perf_counter() - started
+        if self.recording:
+            self.samples.append((step, elapsed, response.status_code in expect))
+        return response
+
+
+def percentile(ordered, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples, wall_seconds: float):
+    latencies = sorted(seconds for _, seconds, _ in samples)
+    errors = sum(1 for _, _, ok in samples if not ok)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / wall_seconds, 2) if wall_seconds else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+    }
+
+
+async def run_scenario(client, data: Dataset, name: str, args):
+    scenario, as_admin = SCENARIOS[name]
+    vus = []
+    for i in range(args.users):
+        rng = random.Random(f"{args.seed}-{name}-{i}")
+        email = ADMIN_EMAIL if as_admin else data.users[(args.seed + i) % len(data.users)]
+        vu = VirtualUser(client, data, email, args.password, rng)
+        await vu.authenticate()
+        vus.append(vu)
+
+    async def drive(vu, iterations):
+        for _ in range(iterations):
+            await scenario(vu)
+
+    await asyncio.gather(*(drive(vu, args.warmup) for vu in vus))
+    for vu in vus:
+        vu.recording = True
+    started = perf_counter()
+    await asyncio.gather(*(drive(vu, args.iterations) for vu in vus))
+    wall = perf_counter() - started
+
+    samples = [sample for vu in vus for sample in vu.samples]
+    steps = {}
+    for sample in samples:
+        steps.setdefault(sample[0], []).append(sample)
+    return {
+        "wall_seconds": round(wall, 3),
+        "iterations": args.iterations * args.users,
+        **summarize(samples, wall),
+        "steps": {step: summarize(step_samples, wall) for step, step_samples in steps.items()},
+    }
+
+
+def _git_revision():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  cwd=Path(__file__).parent, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, cwd=Path(__file__).parent).stdout.strip()
+        return revision + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _row_counts(engine):
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        return {table: conn.execute(text(f"SELECT count(*) FROM {table}")).scalar() for table in COUNTED_TABLES}
+
+
+async def run(args):
+    # app.main connects at import time, so the environment is set first
+    os.environ["DATABASE_URL"] = args.url
+    os.environ.setdefault("GEOCODING_MODE", "inline")  # seeded addresses are all geocode cache hits
+    os.environ.setdefault("REPORT_ARTIFACT_DIR", tempfile.mkdtemp(prefix="aquaflow-reports-"))
+    import httpx
+    from app.database import SessionLocal, engine
+    from app.main import app
+
+    with SessionLocal() as db:
+        data = Dataset(db)
+    results = {
+        "meta": {
+            "started_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "git": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": engine.dialect.name,
+            "rows": _row_counts(engine),
+            "users": args.users,
+            "iterations": args.iterations,
+            "seed": args.seed,
+        },
+        "scenarios": {},
+    }
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://aquaflow.bench", timeout=None) as client:
+            for name in args.scenarios:
+                print(f"▶ {name} ({args.users} users x {args.iterations} iterations)", flush=True)
+                results["scenarios"][name] = await run_scenario(client, data, name, args)
+    engine.dispose()
+    return results
+
+
+def print_results(results):
+    print(f"\n{'scenario / step':<34}{'reqs':>7}{'err':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, scenario in results["scenarios"].items():
+        rows = [(name, scenario)] + [(f"  {step}", s) for step, s in scenario["steps"].items()]
+        for label, s in rows:
+            latency = s["latency_ms"]
+            print(f"{label:<34}{s['requests']:>7}{s['errors']:>5}{s['throughput_rps']:>9}"
+                  f"{latency['p50']:>9}{latency['p95']:>9}{latency['p99']:>9}")
+
+
+def _change(current, baseline):
+    return (current - baseline) / baseline * 100 if baseline else 0.0
+
+
+def compare(results, baseline, max_regression=None):
+    """Prints p95 and throughput against a baseline run; returns the regressed scenarios."""
+    print(f"\nAgainst baseline {baseline['meta'].get('git')} ({baseline['meta'].get('started_at')})")
+    print(f"{'scenario / step':<34}{'p95 ms':>18}{'change':>9}{'req/s':>18}{'change':>9}")
+    regressed = []
+    for name, scenario in results["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        rows = [(name, scenario, before)] + [
+            (f"  {step}", s, before["steps"][step]) for step, s in scenario["steps"].items() if step in before["steps"]
+        ]
+        for label, now, then in rows:
+            p95 = _change(now["latency_ms"]["p95"], then["latency_ms"]["p95"])
+            rps = _change(now["throughput_rps"], then["throughput_rps"])
+            print(f"{label:<34}{then['latency_ms']['p95']:>8} → {now['latency_ms']['p95']:<7}{p95:>+8.1f}%"
+                  f"{then['throughput_rps']:>8} → {now['throughput_rps']:<7}{rps:>+8.1f}%")
+        p95 = _change(scenario["latency_ms"]["p95"], before["latency_ms"]["p95"])
+        rps = _change(scenario["throughput_rps"], before["throughput_rps"])
+        if max_regression is not None and (p95 > max_regression or rps < -max_regression):
+            regressed.append(name)
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.load_test")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--db", default="bench.db", help="seeded SQLite file; a scratch copy is used (default: bench.db)")
+    target.add_argument("--url", help="seeded database URL; runs in place, so writes accumulate between runs")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma-separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--users", type=int, default=8, help="concurrent virtual users per scenario (default: 8)")
+    parser.add_argument("--iterations", type=int, default=20, help="timed iterations per virtual user (default: 20)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed iterations per virtual user (default: 1)")
+    parser.add_argument("--seed", type=int, default=42, help="seed for the virtual users' choices")
+    parser.add_argument("--password", default=BENCH_PASSWORD, help="password of the seeded accounts")
+    parser.add_argument("--out", type=Path, help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--baseline", type=Path, help="earlier results file to compare against")
+    parser.add_argument("--max-regression", type=float,
+                        help="exit 1 when a scenario's p95 or throughput is this many percent worse than the baseline")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+
+    with tempfile.TemporaryDirectory(prefix="aquaflow-bench-") as scratch:
+        if not args.url:
+            if not os.path.exists(args.db):
+                parser.error(f"{args.db} does not exist; create it with python -m benchmarks.seed_data --db {args.db}")
+            copy = os.path.join(scratch, "bench.db")
+            shutil.copyfile(args.db, copy)
+            args.url = f"sqlite:///{copy}"
+        results = asyncio.run(run(args))
+
+    print_results(results)
+    out = args.out or RESULTS_DIR / f"{datetime.utcnow():%Y%m%dT%H%M%SZ}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+    print(f"\nResults written to {out}")
+
+    if baseline:
+        regressed = compare(results, baseline, args.max_regression)
+        if regressed:
+            print(f"\n❌ Regressed beyond {args.max_regression}%: {', '.join(regressed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Product search latency, and a check that the full-text index is used.
+
+Run from the backend folder against a seeded database (see benchmarks.seed_data):
+
+    python -m benchmarks.product_search --db bench.db
+    python -m benchmarks.product_search --url postgresql://user:pw@localhost/aquaflow_bench --repeat 200
+
+Builds the same query as GET /products/?search=... for a handful of terms
+taken from product names, prints its plan and times it. The run fails when
+the plan does not go through the index: products_fts on SQLite,
+ix_products_search on Postgres. On Postgres the plan is taken with
+enable_seqscan off, so a small table still shows whether the query
+expression can match the index at all.
+"""
+import argparse
+import statistics
+import sys
+from time import perf_counter
+
+from sqlalchemy import select
+
+from app import models
+from app.database import build_engine
+from app.query_log import explain
+from app.search import apply_product_search, setup_product_search
+
+EXPECTED_INDEX = {"sqlite": "products_fts", "postgresql": "ix_products_search"}
+
+
+def search_terms(engine, count: int):
+    with engine.connect() as conn:
+        names = conn.execute(select(models.Product.name).order_by(models.Product.id).limit(200)).scalars().all()
+    words = sorted({word.lower() for name in names for word in name.split() if word.isalpha() and len(word) > 2})
+    if not words:
+        raise SystemExit("no products to search; seed the database first")
+    # Whole words and type-ahead prefixes
+    step = max(1, len(words) // count)
+    picked = words[::step][:count]
+    return picked + [word[:3] for word in picked[:count // 2]]
+
+
+def search_statement(engine, term: str, limit: int = 10):
+    return apply_product_search(select(models.Product), term, engine.dialect.name).limit(limit)
+
+
+def plan_for(engine, term: str):
+    compiled = search_statement(engine, term).compile(dialect=engine.dialect)
+    params = compiled.params
+    if compiled.positiontup is not None:
+        params = tuple(params[name] for name in compiled.positiontup)
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        return explain(conn, str(compiled), params)
+
+
+def time_searches(engine, terms, repeat: int):
+    timings = {}
+    with engine.connect() as conn:
+        for term in terms:
+            stmt = search_statement(engine, term)
+            conn.execute(stmt).all()  # warm the cache
+            samples = []
+            for _ in range(repeat):
+                started = perf_counter()
+                conn.execute(stmt).all()
+                samples.append((perf_counter() - started) * 1000)
+            timings[term] = samples
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.product_search")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--db", default="bench.db", help="seeded SQLite file (default: bench.db)")
+    target.add_argument("--url", help="database URL to use instead of --db")
+    parser.add_argument("--terms", type=int, default=6, help="distinct search terms (default: 6)")
+    parser.add_argument("--repeat", type=int, default=100, help="runs per term (default: 100)")
+    args = parser.parse_args(argv)
+
+    engine = build_engine(args.url or f"sqlite:///{args.db}")
+    dialect = engine.dialect.name
+    setup_product_search(engine)
+    terms = search_terms(engine, args.terms)
+
+    plan = plan_for(engine, terms[0])
+    print(f"Plan for {terms[0]!r} on {dialect}:")
+    for line in plan or ["(no plan)"]:
+        print(f"  {line}")
+    expected = EXPECTED_INDEX.get(dialect)
+    uses_index = expected is None or any(expected in line for line in plan or [])
+
+    print(f"\n{'term':<16}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for term, samples in time_searches(engine, terms, args.repeat).items():
+        samples.sort()
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{term:<16}{statistics.median(samples):>10.2f}{p95:>10.2f}{samples[-1]:>10.2f}")
+    engine.dispose()
+
+    if not uses_index:
+        print(f"\n❌ the search query does not use {expected}", file=sys.stderr)
+        return 1
+    if expected:
+        print(f"\n✅ search uses {expected}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
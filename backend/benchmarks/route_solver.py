@@ -0,0 +1,58 @@
+"""Route length and runtime: crud.optimize_delivery_route against app.routing.optimize_route.
+
+Run from the backend folder:
+
+    python -m benchmarks.route_solver
+    python -m benchmarks.route_solver --sizes 100 400 --time-budget 0.5 --seed 7
+
+Both solvers get the same stops, jittered street addresses around Yaoundé's
+quarters drawn from --seed, and both routes are measured with the same
+haversine path length from HQ. The reference is plain nearest neighbour
+with geopy; the replacement adds 2-opt and Or-opt within --time-budget, so
+its route should never be longer.
+"""
+import argparse
+import random
+from time import perf_counter
+from types import SimpleNamespace
+
+from app.crud import optimize_delivery_route
+from app.routing import HQ_COORDS, optimize_route, path_length_km
+from benchmarks.seed_data import COORD_JITTER, QUARTERS
+
+
+def stops(seed: int, count: int):
+    rng = random.Random(f"{seed}-route-{count}")
+    result = []
+    for i in range(count):
+        _, lat, lng = rng.choice(QUARTERS)
+        result.append(SimpleNamespace(id=i, latitude=rng.gauss(lat, COORD_JITTER), longitude=rng.gauss(lng, COORD_JITTER)))
+    return result
+
+
+def measure(solve, deliveries):
+    started = perf_counter()
+    route = solve(deliveries)
+    seconds = perf_counter() - started
+    assert sorted(d.id for d in route) == list(range(len(deliveries))), "route is not a permutation of the stops"
+    return path_length_km([HQ_COORDS] + [(d.latitude, d.longitude) for d in route]), seconds
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.route_solver")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 500], help="stop counts (default: 50 200 500)")
+    parser.add_argument("--time-budget", type=float, default=1.0, help="improvement budget in seconds (default: 1.0)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    print(f"{'stops':>6}  {'reference km':>13}{'seconds':>9}  {'matrix km':>10}{'seconds':>9}  {'shorter':>8}{'speedup':>9}")
+    for count in args.sizes:
+        deliveries = stops(args.seed, count)
+        old_km, old_s = measure(optimize_delivery_route, deliveries)
+        new_km, new_s = measure(lambda d: optimize_route(d, time_budget=args.time_budget), deliveries)
+        shorter = (old_km - new_km) / old_km * 100 if old_km else 0.0
+        print(f"{count:>6}  {old_km:>13.1f}{old_s:>9.3f}  {new_km:>10.1f}{new_s:>9.3f}  {shorter:>7.1f}%{old_s / new_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
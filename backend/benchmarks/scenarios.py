@@ -0,0 +1,87 @@
+"""Scenario scripts for benchmarks.load_test.
+
+A scenario is one iteration of what a kind of client does, written against
+a VirtualUser. Every request goes through vu.call(step, ...), which times
+it under the step's name. Choices come from vu.rng, so the sequence of
+requests is the same on every run with the same seed.
+"""
+from datetime import date, timedelta
+
+PAGE = 20
+
+
+async def login(vu):
+    # bcrypt dominates; this is the cost of a cold session
+    await vu.call("login", "POST", "/login", data={"username": vu.email, "password": vu.password}, auth=False)
+    await vu.call("profile", "GET", "/users/profile")
+
+
+async def browse(vu):
+    response = await vu.call("list products", "GET", "/products/", params={"limit": PAGE})
+    cursor = response.headers.get("X-Next-Cursor")
+    if cursor:
+        await vu.call("next page", "GET", "/products/", params={"limit": PAGE, "cursor": cursor})
+    await vu.call("top rated", "GET", "/products/", params={"limit": PAGE, "sort": "rating"})
+    await vu.call("category", "GET", "/products/", params={"limit": PAGE, "category": vu.rng.choice(vu.data.categories)})
+    await vu.call("search", "GET", "/products/", params={"limit": 10, "search": vu.rng.choice(vu.data.search_terms)})
+
+    product_id = vu.product()
+    await vu.call("product detail", "GET", f"/products/{product_id}")
+    await vu.call("product reviews", "GET", f"/reviews/product/{product_id}", params={"limit": PAGE})
+    await vu.call("rating average", "GET", f"/reviews/product/{product_id}/average")
+
+
+async def cart(vu):
+    product_id = vu.product()
+    await vu.call("add to cart", "POST", "/cart/add", json={"product_id": product_id, "quantity": vu.rng.randint(1, 4)})
+    await vu.call("view cart", "GET", "/cart/", params={"limit": PAGE})
+    await vu.call("bookmark", "POST", "/bookmarks/", json={"product_id": product_id})
+    await vu.call("bookmarks", "GET", "/bookmarks/", params={"limit": PAGE})
+    await vu.call("remove from cart", "DELETE", f"/cart/{product_id}")
+
+
+async def ordering(vu):
+    await vu.call("place order", "POST", "/delivery/", json={
+        "product_id": vu.product(),
+        "address": vu.rng.choice(vu.data.addresses),
+        "quantity": vu.rng.randint(1, 6),
+    })
+    await vu.call("track orders", "GET", "/delivery/track", params={"limit": PAGE})
+    await vu.call("notifications", "GET", "/notifications/", params={"limit": PAGE})
+
+
+async def admin(vu):
+    response = await vu.call("delivery requests", "GET", "/delivery/requests", params={"limit": 50})
+    cursor = response.headers.get("X-Next-Cursor")
+    if cursor:
+        await vu.call("delivery requests p2", "GET", "/delivery/requests", params={"limit": 50, "cursor": cursor})
+    await vu.call("users", "GET", "/users/", params={"limit": 50})
+    await vu.call("drivers", "GET", "/drivers/")
+    await vu.call("dashboard summary", "GET", "/dashboard/summary")
+    await vu.call("monthly sales", "GET", "/dashboard/monthly-sales")
+    await vu.call("reports dashboard", "GET", "/reports/dashboard")
+    await vu.call("reports summary", "GET", "/reports/summary", params={"period": vu.rng.choice(["7d", "30d", "90d"])})
+
+
+async def export(vu):
+    end = date.fromisoformat(vu.data.anchor)
+    start = end - timedelta(days=vu.rng.choice([7, 30]))
+    await vu.call("csv export", "GET", "/admin/export-deliveries",
+                  params={"start_date": start.isoformat(), "end_date": end.isoformat()})
+
+
+async def routing(vu):
+    await vu.call("optimized route", "GET", "/delivery/optimized-route", params={"time_budget": 0.2}, expect=(200, 404))
+    await vu.call("plan routes", "GET", "/delivery/plan-routes", params={"time_limit": 0.5}, expect=(200, 404))
+
+
+# name: (coroutine, runs as admin)
+SCENARIOS = {
+    "login": (login, False),
+    "browse": (browse, False),
+    "cart": (cart, False),
+    "ordering": (ordering, False),
+    "admin": (admin, True),
+    "export": (export, True),
+    "routing": (routing, True),
+}
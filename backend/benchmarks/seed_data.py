@@ -0,0 +1,409 @@
+"""Deterministic benchmark dataset for the AquaFlow backend.
+
+Run from the backend folder:
+
+    python -m benchmarks.seed_data --db bench.db --rows 100k
+    python -m benchmarks.seed_data --db bench-10m.db --rows 10m --seed 7
+    python -m benchmarks.seed_data --url postgresql://user:pw@localhost/aquaflow_bench --rows 1m
+
+Fills users, products, reviews, bookmarks, cart items, notifications,
+drivers and deliveries so that these tables together hold roughly --rows
+rows (10k to 10M). The same --seed and --anchor always produce the same
+rows, apart from the bcrypt salt and the updated_at stamped by the rating
+repair. Every table draws from its own random stream, so changing one
+table's size does not reshuffle the others.
+
+Deliveries go to real Yaoundé neighbourhoods, with coordinates jittered
+around each quarter's centre. Every address is also written to the
+geocode cache, so orders placed during a load test never call Nominatim;
+that table holds one row per address in the fixed pool, whatever --rows is.
+Timestamps run up to --anchor (default: today, UTC). Only the newest
+--pending orders are still pending, which keeps route optimization at
+a realistic size.
+
+All users share the password in BENCH_PASSWORD. Hashing millions of
+distinct passwords with bcrypt would take days.
+"""
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+from time import perf_counter
+
+BENCH_PASSWORD = "benchmark"
+ADMIN_EMAIL = "admin@bench.example.com"
+BATCH_SIZE = 5_000
+
+# Share of --rows per table; products and drivers are sized separately
+TABLE_SHARES = {
+    "users": 0.10,
+    "product_reviews": 0.10,
+    "user_bookmarks": 0.08,
+    "cart_items": 0.05,
+    "notifications": 0.20,
+    "delivery_requests": 0.47,
+}
+
+# (quarter, latitude, longitude) of Yaoundé neighbourhood centres
+QUARTERS = [
+    ("Bastos", 3.8890, 11.5130), ("Nlongkak", 3.8830, 11.5190), ("Etoudi", 3.9100, 11.5290),
+    ("Emana", 3.9200, 11.5200), ("Tsinga", 3.8800, 11.5050), ("Mokolo", 3.8730, 11.5000),
+    ("Briqueterie", 3.8780, 11.5080), ("Essos", 3.8700, 11.5350), ("Mvog-Ada", 3.8620, 11.5270),
+    ("Mvog-Mbi", 3.8540, 11.5180), ("Nsam", 3.8330, 11.5160), ("Mvan", 3.8150, 11.5250),
+    ("Ekounou", 3.8200, 11.5450), ("Odza", 3.7850, 11.5450), ("Biyem-Assi", 3.8400, 11.4870),
+    ("Mendong", 3.8250, 11.4750), ("Melen", 3.8620, 11.4950), ("Ngoa-Ekelle", 3.8600, 11.5000),
+    ("Obili", 3.8580, 11.4920), ("Nkolbisson", 3.8750, 11.4500), ("Mimboman", 3.8650, 11.5520),
+    ("Ngousso", 3.8950, 11.5500), ("Efoulan", 3.8300, 11.5000), ("Nkomo", 3.8200, 11.5350),
+]
+STREETS_PER_QUARTER = 200
+COORD_JITTER = 0.004  # degrees, roughly 450 m
+
+CATEGORIES = {
+    "Bottles": (300, 2_500), "Sachets": (25, 150), "Dispensers": (15_000, 90_000),
+    "Gallons": (1_500, 6_000), "Sparkling": (400, 1_500), "Accessories": (500, 10_000),
+}
+BRANDS = ["Tangui", "Supermont", "Aquabelle", "Opur", "Vitale", "Semme", "Reaktor", "VanPur", "Source du Pays"]
+SIZES = ["0.5L", "1L", "1.5L", "5L", "10L", "19L", "Pack x6", "Pack x12", "Carton"]
+VEHICLES = ["Tricycle", "Pickup", "Van", "Motorbike", "Truck"]
+REVIEW_COMMENTS = ["", "Fresh and cold", "Delivered late", "Good price", "Bottle was damaged", "Always reliable"]
+NOTIFICATION_MESSAGES = [
+    "Your delivery #{n} has been approved.",
+    "Your delivery #{n} is out for delivery.",
+    "Your delivery #{n} has been delivered.",
+    "New promotion on water packs this week!",
+]
+
+
+def parse_rows(value: str) -> int:
+    """'250000', '100k' or '1.5m'."""
+    value = value.strip().lower().replace("_", "")
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    number = value[:-1] if multiplier > 1 else value
+    rows = int(float(number) * multiplier)
+    if rows < 1_000:
+        raise argparse.ArgumentTypeError("--rows must be at least 1k")
+    return rows
+
+
+def plan_sizes(rows: int):
+    sizes = {table: int(rows * share) for table, share in TABLE_SHARES.items()}
+    sizes["users"] = max(sizes["users"], 50)
+    sizes["products"] = min(5_000, max(20, rows // 2_000))
+    sizes["drivers"] = min(500, max(5, rows // 50_000))
+    return sizes
+
+
+def address_pool(seed: int):
+    """[(address, latitude, longitude)]: a fixed set of street addresses per quarter."""
+    rng = random.Random(f"{seed}-addresses")
+    pool = []
+    for quarter, lat, lng in QUARTERS:
+        for street in range(1, STREETS_PER_QUARTER + 1):
+            pool.append((
+                f"Rue {street}, {quarter}, Yaoundé",
+                round(rng.gauss(lat, COORD_JITTER), 6),
+                round(rng.gauss(lng, COORD_JITTER), 6),
+            ))
+    return pool
+
+
+def _batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(engine, table, rows):
+    count = 0
+    for batch in _batched(rows):
+        with engine.begin() as conn:
+            conn.execute(table.insert(), batch)
+        count += len(batch)
+    return count
+
+
+def _reset_sequences(engine, tables):
+    """Moves Postgres id sequences past the explicit ids the generators insert.
+
+    Otherwise the first row the app itself creates collides with id 1.
+    """
+    from sqlalchemy import text
+
+    with engine.begin() as conn:
+        for table in tables:
+            if "id" not in table.c or not table.c.id.autoincrement:
+                continue
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"coalesce(max(id), 1), max(id) IS NOT NULL) FROM {table.name}"
+            ))
+
+
+def _pairs(rng, users: int, products: int, target: int):
+    """About `target` distinct (user_id, product_id) pairs spread over all users."""
+    per_user = target / users
+    whole, fraction = int(per_user), per_user - int(per_user)
+    for user_id in range(1, users + 1):
+        k = min(products, whole + (1 if rng.random() < fraction else 0))
+        for product_id in rng.sample(range(1, products + 1), k):
+            yield user_id, product_id
+
+
+def _moment(rng, start: datetime, span: timedelta):
+    return start + timedelta(seconds=rng.random() * span.total_seconds())
+
+
+def generate_users(seed, count, hashed_password):
+    rng = random.Random(f"{seed}-users")
+    yield {"id": 1, "username": "admin", "email": ADMIN_EMAIL, "hashed_password": hashed_password,
+           "is_active": True, "role": "admin"}
+    for user_id in range(2, count + 1):
+        yield {
+            "id": user_id,
+            "username": f"user{user_id:08d}",
+            "email": f"user{user_id}@bench.example.com",
+            "hashed_password": hashed_password,
+            "is_active": rng.random() > 0.02,
+            "role": "user",
+        }
+
+
+def generate_products(seed, count, anchor):
+    rng = random.Random(f"{seed}-products")
+    categories = list(CATEGORIES)
+    for product_id in range(1, count + 1):
+        category = categories[(product_id - 1) % len(categories)]
+        low, high = CATEGORIES[category]
+        created = _moment(rng, anchor - timedelta(days=900), timedelta(days=500))
+        yield {
+            "id": product_id,
+            "name": f"{rng.choice(BRANDS)} {category[:-1] if category.endswith('s') else category} "
+                    f"{rng.choice(SIZES)} #{product_id}",
+            "description": f"{category} from the benchmark catalogue",
+            "quantity": rng.randint(0, 2_000),
+            "image": None,
+            "price": float(round(rng.uniform(low, high), -1)),
+            "category": category,
+            "isPopular": rng.random() < 0.1,
+            "rating": 0.0,
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+def product_weights(seed, count):
+    """Cumulative popularity weights: a few products take most of the orders."""
+    rng = random.Random(f"{seed}-popularity")
+    weights = [rng.paretovariate(1.2) for _ in range(count)]
+    cumulative, total = [], 0.0
+    for w in weights:
+        total += w
+        cumulative.append(total)
+    return cumulative
+
+
+def generate_drivers(seed, count):
+    rng = random.Random(f"{seed}-drivers")
+    for driver_id in range(1, count + 1):
+        yield {
+            "id": driver_id,
+            "name": f"Driver {driver_id}",
+            "phone": f"+2376{driver_id:08d}",
+            "vehicle": rng.choice(VEHICLES),
+            "capacity": rng.choice([60, 80, 100, 150, 200]),
+        }
+
+
+def generate_reviews(seed, users, products, target, anchor):
+    rng = random.Random(f"{seed}-reviews")
+    for review_id, (user_id, product_id) in enumerate(_pairs(rng, users, products, target), start=1):
+        created = _moment(rng, anchor - timedelta(days=365), timedelta(days=365))
+        yield {
+            "id": review_id,
+            "user_id": user_id,
+            "product_id": product_id,
+            "rating": rng.choices([1, 2, 3, 4, 5], weights=[4, 6, 15, 35, 40])[0],
+            "comment": rng.choice(REVIEW_COMMENTS),
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+def generate_bookmarks(seed, users, products, target):
+    rng = random.Random(f"{seed}-bookmarks")
+    for user_id, product_id in _pairs(rng, users, products, target):
+        yield {"user_id": user_id, "product_id": product_id}
+
+
+def generate_cart_items(seed, users, products, target, anchor):
+    rng = random.Random(f"{seed}-cart")
+    for item_id, (user_id, product_id) in enumerate(_pairs(rng, users, products, target), start=1):
+        yield {
+            "id": item_id,
+            "user_id": user_id,
+            "product_id": product_id,
+            "quantity": rng.randint(1, 6),
+            "created_at": _moment(rng, anchor - timedelta(days=30), timedelta(days=30)),
+        }
+
+
+def generate_notifications(seed, users, count, anchor):
+    rng = random.Random(f"{seed}-notifications")
+    start, span = anchor - timedelta(days=365), timedelta(days=365)
+    for notification_id in range(1, count + 1):
+        yield {
+            "id": notification_id,
+            "user_id": rng.randint(1, users),
+            "message": rng.choice(NOTIFICATION_MESSAGES).format(n=rng.randint(1, 10**6)),
+            "is_read": rng.random() < 0.7,
+            "created_at": _moment(rng, start, span),
+        }
+
+
+def generate_deliveries(seed, users, products, drivers, count, pending, days, anchor, addresses):
+    """Deliveries in creation order; the newest `pending` ones are still waiting for approval."""
+    from app.crud import estimate_delivery_time
+
+    rng = random.Random(f"{seed}-deliveries")
+    popularity = product_weights(seed, products)
+    product_ids = range(1, products + 1)
+    estimates = [estimate_delivery_time(lat, lng) for _, lat, lng in addresses]
+    start = anchor - timedelta(days=days)
+    step = timedelta(days=days).total_seconds() / count
+    pending_from = count - min(pending, count)
+
+    for i in range(count):
+        created = start + timedelta(seconds=(i + rng.random()) * step)
+        slot = rng.randrange(len(addresses))
+        address, lat, lng = addresses[slot]
+        age = anchor - created
+        if i >= pending_from:
+            status, stage, driver_id, locked = "pending", "confirmed", None, False
+        elif rng.random() < 0.05:
+            status, stage, driver_id, locked = "rejected", "confirmed", None, False
+        else:
+            if age > timedelta(days=2):
+                stage = "delivered" if rng.random() < 0.97 else "out_for_delivery"
+            else:
+                stage = rng.choice(["preparing", "out_for_delivery", "delivered"])
+            status, driver_id, locked = "approved", rng.randint(1, drivers), True
+        yield {
+            "id": i + 1,
+            "user_id": rng.randint(2, users),
+            "product_id": rng.choices(product_ids, cum_weights=popularity)[0],
+            "quantity": min(20, max(1, int(rng.expovariate(0.35)) + 1)),
+            "address": address,
+            "status": status,
+            "stage": stage,
+            "driver_id": driver_id,
+            "is_locked": locked,
+            "latitude": lat,
+            "longitude": lng,
+            "estimated_delivery_time": estimates[slot],
+            "created_at": created,
+            "updated_at": created,
+        }
+
+
+def generate_geocode_cache(addresses, anchor):
+    from app.geocoding import normalize_address
+
+    for address, lat, lng in addresses:
+        yield {"address_key": normalize_address(address), "latitude": lat, "longitude": lng,
+               "found": True, "updated_at": anchor}
+
+
+def seed(args):
+    # app.database reads DATABASE_URL at import time
+    os.environ["DATABASE_URL"] = args.url
+    from sqlalchemy import text
+    from app import crud, models, rollups
+    from app.auth import get_password_hash
+    from app.database import Base, SessionLocal, add_missing_columns, engine
+    from app.search import setup_product_search
+
+    Base.metadata.create_all(bind=engine)
+    add_missing_columns(Base.metadata)
+    with SessionLocal() as db:
+        if db.query(models.User.id).first() is not None:
+            raise SystemExit(f"{args.url} already has data; seed into an empty database")
+
+    anchor = args.anchor
+    sizes = plan_sizes(args.rows)
+    addresses = address_pool(args.seed)
+    hashed_password = get_password_hash(BENCH_PASSWORD)
+    users, products, drivers = sizes["users"], sizes["products"], sizes["drivers"]
+
+    steps = [
+        ("users", models.User.__table__, generate_users(args.seed, users, hashed_password)),
+        ("products", models.Product.__table__, generate_products(args.seed, products, anchor)),
+        ("drivers", models.Driver.__table__, generate_drivers(args.seed, drivers)),
+        ("geocode_cache", models.GeocodeCacheEntry.__table__, generate_geocode_cache(addresses, anchor)),
+        ("product_reviews", models.ProductReview.__table__,
+         generate_reviews(args.seed, users, products, sizes["product_reviews"], anchor)),
+        ("user_bookmarks", models.user_bookmarks,
+         generate_bookmarks(args.seed, users, products, sizes["user_bookmarks"])),
+        ("cart_items", models.CartItem.__table__,
+         generate_cart_items(args.seed, users, products, sizes["cart_items"], anchor)),
+        ("notifications", models.Notification.__table__,
+         generate_notifications(args.seed, users, sizes["notifications"], anchor)),
+        ("delivery_requests", models.DeliveryRequest.__table__,
+         generate_deliveries(args.seed, users, products, drivers, sizes["delivery_requests"],
+                             args.pending, args.days, anchor, addresses)),
+    ]
+
+    print(f"Seeding {args.url} with ~{args.rows:,} rows (seed {args.seed}, anchor {anchor:%Y-%m-%d})")
+    total = 0
+    for name, table, rows in steps:
+        started = perf_counter()
+        count = _insert(engine, table, rows)
+        if name != "geocode_cache":  # sized by the address pool, not by --rows
+            total += count
+        print(f"  {name:<20}{count:>12,} rows  {perf_counter() - started:8.1f}s")
+    if engine.dialect.name == "postgresql":
+        _reset_sequences(engine, [table for _, table, _ in steps])
+
+    # Derived data the app would normally maintain on writes
+    started = perf_counter()
+    with SessionLocal() as db:
+        crud.repair_rating_aggregates(db)
+        rollups.backfill_unit_prices(db)
+        rollups.rebuild_delivery_stats(db)
+        rollups.rebuild_monthly_sales(db)
+    setup_product_search(engine)
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    elif engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE"))
+    engine.dispose()
+    print(f"  {'aggregates':<20}{'':>12}       {perf_counter() - started:8.1f}s")
+    print(f"✅ {total:,} rows plus {len(addresses):,} geocode cache entries; log in as {ADMIN_EMAIL} or user<N>@bench.example.com, password {BENCH_PASSWORD!r}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.seed_data")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--db", default="bench.db", help="SQLite file to create (default: bench.db)")
+    target.add_argument("--url", help="database URL to seed instead of --db; must be empty")
+    parser.add_argument("--rows", type=parse_rows, default=parse_rows("100k"),
+                        help="approximate total rows, e.g. 10k, 250k, 1m, 10m (default: 100k)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--anchor", type=lambda s: datetime.strptime(s, "%Y-%m-%d"),
+                        default=datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0),
+                        help="date the history ends at, YYYY-MM-DD (default: today)")
+    parser.add_argument("--days", type=int, default=365, help="days of order history (default: 365)")
+    parser.add_argument("--pending", type=int, default=150, help="newest orders left pending (default: 150)")
+    args = parser.parse_args(argv)
+    args.url = args.url or f"sqlite:///{args.db}"
+    seed(args)
+
+
+if __name__ == "__main__":
+    main()
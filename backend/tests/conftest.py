@@ -0,0 +1,12 @@
+# Run from the backend folder: python -m pytest tests
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.database reads these at import time; tests get a scratch database, never eden.db
+_scratch = tempfile.mkdtemp(prefix="aquaflow-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch, 'test.db')}"
+os.environ.setdefault("REPORT_ARTIFACT_DIR", os.path.join(_scratch, "reports"))
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
@@ -0,0 +1,102 @@
+"""Keyset pagination: every row exactly once, in order, and bad cursors rejected."""
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import Base
+from app.main import app
+from app.pagination import NEXT_CURSOR_HEADER, PageParams, decode_cursor, encode_cursor, paginate
+
+FEED = (models.Notification.created_at, models.Notification.id)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(models.User(id=1, username="reader", email="reader@example.com", hashed_password="x", role="user"))
+    # Runs of identical created_at values, so only the id breaks ties
+    start = datetime(2026, 1, 1, 8, 0)
+    session.add_all(
+        models.Notification(user_id=1, message=f"n{i}", created_at=start + timedelta(minutes=i // 4))
+        for i in range(23)
+    )
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def walk(db, columns, limit, descending=False):
+    """All pages of the notification feed, following X-Next-Cursor until it is absent."""
+    pages, cursor = [], None
+    while True:
+        page = PageParams(Response(), cursor=cursor, limit=limit)
+        items = paginate(db.query(models.Notification), columns, page, descending=descending)
+        pages.append(items)
+        cursor = page.response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+        assert len(pages) < 100, "cursor did not advance"
+
+
+@pytest.mark.parametrize("limit", [1, 3, 4, 5, 22, 23, 100])
+def test_cursor_round_trip_with_tied_timestamps(db, limit):
+    pages = walk(db, FEED, limit, descending=True)
+    ids = [n.id for items in pages for n in items]
+
+    assert len(ids) == len(set(ids)) == 23
+    assert all(len(items) == limit for items in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
+
+
+def test_descending_order(db):
+    rows = [n for items in walk(db, FEED, 5, descending=True) for n in items]
+    keys = [(n.created_at, n.id) for n in rows]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_ascending_single_column(db):
+    rows = [n for items in walk(db, (models.Notification.id,), 6) for n in items]
+    assert [n.id for n in rows] == list(range(1, 24))
+
+
+def test_last_page_has_no_cursor(db):
+    page = PageParams(Response(), cursor=None, limit=23)
+    assert len(paginate(db.query(models.Notification), FEED, page, descending=True)) == 23
+    assert NEXT_CURSOR_HEADER not in page.response.headers
+
+
+def test_datetime_survives_encoding():
+    created = datetime(2026, 1, 1, 8, 30, 15, 123456)
+    assert decode_cursor(encode_cursor([created, 7]), FEED) == [created, 7]
+
+
+@pytest.mark.parametrize("token", [
+    "not base64!",
+    encode_cursor([1]),                    # wrong number of values
+    encode_cursor(["yesterday", 1]),       # not a timestamp
+    encode_cursor({"id": 1}),              # not a list
+    "e30",                                 # base64 of "{}"
+])
+def test_invalid_cursor_is_rejected(token):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(token, FEED)
+    assert raised.value.status_code == 400
+
+
+def test_invalid_cursor_is_a_400_over_http():
+    client = TestClient(app)
+    client.post("/register", json={"username": "pg-user", "email": "pg-user@example.com", "password": "pw", "role": "user"})
+    token = client.post("/login", data={"username": "pg-user@example.com", "password": "pw"}).json()["access_token"]
+
+    response = client.get("/notifications/", params={"cursor": "garbage"}, headers={"Authorization": f"Bearer {token}"})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
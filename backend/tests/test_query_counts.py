@@ -0,0 +1,88 @@
+"""The delivery list endpoints must not issue one query per row (N+1)."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import models
+from app.database import SessionLocal, async_engine, engine
+from app.main import app
+
+client = TestClient(app)
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+@pytest.fixture
+def count_statements():
+    counter = StatementCounter()
+    engines = [engine, async_engine.sync_engine]  # /delivery/track runs on the async engine
+    for e in engines:
+        event.listen(e, "before_cursor_execute", counter)
+    yield counter
+    for e in engines:
+        event.remove(e, "before_cursor_execute", counter)
+
+
+def _token(username: str, role: str):
+    email = f"{username}@example.com"
+    client.post("/register", json={"username": username, "email": email, "password": "pw", "role": role})
+    response = client.post("/login", data={"username": email, "password": "pw"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture(scope="module")
+def tokens():
+    return {"admin": _token("qc-admin", "admin"), "user": _token("qc-user", "user")}
+
+
+def seed_deliveries(n: int, owner_email: str):
+    """n pending deliveries, each with its own product, driver and (but for the owner's) user."""
+    db = SessionLocal()
+    try:
+        owner = db.query(models.User).filter(models.User.email == owner_email).one()
+        start = db.query(models.DeliveryRequest).count()
+        for i in range(start, start + n):
+            user = owner if i % 2 else models.User(username=f"qc-customer-{i}", email=f"qc{i}@example.com",
+                                                   hashed_password="x", role="user")
+            product = models.Product(name=f"qc-product-{i}", price=100 + i, category="Bottles")
+            driver = models.Driver(name=f"qc-driver-{i}", phone=f"+237600{i:06d}")
+            db.add_all([user, product, driver])
+            db.flush()
+            db.add(models.DeliveryRequest(
+                user_id=user.id, product_id=product.id, driver_id=driver.id, quantity=1,
+                address=f"Rue {i}, Bastos, Yaoundé", status="pending",
+                latitude=3.85 + i * 0.001, longitude=11.50 + i * 0.001,
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def statements_for(count_statements, path: str, headers):
+    client.get(path, headers=headers)  # warm: principal cache, lazy setup
+    count_statements.count = 0
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200, response.text
+    return count_statements.count, len(response.json())
+
+
+@pytest.mark.parametrize("path, role", [
+    ("/delivery/requests?limit=100", "admin"),
+    ("/delivery/track?limit=100", "user"),
+    ("/delivery/optimized-route?time_budget=0.05", "admin"),
+])
+def test_statement_count_does_not_grow_with_deliveries(count_statements, tokens, path, role):
+    seed_deliveries(5, "qc-user@example.com")
+    few, rows_few = statements_for(count_statements, path, tokens[role])
+
+    seed_deliveries(30, "qc-user@example.com")
+    many, rows_many = statements_for(count_statements, path, tokens[role])
+
+    assert rows_many > rows_few
+    assert many == few
@@ -0,0 +1,37 @@
+"""Slow query log: plans for SELECTs only, and a failed EXPLAIN never breaks the caller."""
+from sqlalchemy import create_engine, text
+
+from app.query_log import SlowQueryLog, explain
+
+
+def test_explain_only_plans_selects():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT)"))
+        assert explain(conn, "SELECT id FROM t WHERE name = ?", ("a",))
+        assert explain(conn, "UPDATE t SET name = ? WHERE id = ?", ("a", 1)) is None
+        assert explain(conn, "CREATE INDEX ix_t_name ON t (name)", ()) is None
+
+
+def test_failed_explain_leaves_the_transaction_usable():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY)"))
+        plan = explain(conn, "SELECT missing FROM t", ())
+        assert plan[0].startswith("EXPLAIN failed")
+        conn.execute(text("INSERT INTO t (id) VALUES (1)"))
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 1
+
+
+def test_counts_statements_and_slow_ones():
+    engine = create_engine("sqlite://")
+    log = SlowQueryLog(threshold_ms=0, explain=False)
+    log.install(engine)
+    with engine.connect() as conn:
+        for _ in range(3):
+            conn.execute(text("SELECT 1"))
+    stats = log.stats()
+    assert stats["statements"] == stats["slow"] == 3
+    assert log.offenders()[0]["count"] == 3
+    log.clear()
+    assert log.stats()["statements"] == 0
@@ -0,0 +1,82 @@
+"""Incremental rollups must agree with a rebuild, whatever happens to prices meanwhile."""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import Base
+from app.rollups import (dashboard_summary, rebuild_delivery_stats, rebuild_monthly_sales,
+                         record_delivery_change, record_stage_changes)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def rollup_rows(db):
+    daily = db.execute(select(models.DailyDeliveryStats.__table__).order_by("day", "status", "stage")).all()
+    sales = db.execute(select(models.MonthlyCategorySales.__table__).order_by("year", "month", "category")).all()
+    return daily, sales
+
+
+def order(db, product, quantity=2):
+    delivery = models.DeliveryRequest(product_id=product.id, quantity=quantity, address="Rue 1, Bastos, Yaoundé",
+                                      status="pending", stage="confirmed", created_at=datetime(2026, 3, 14, 9))
+    db.add(delivery)
+    db.flush()
+    record_delivery_change(db, delivery, new=(delivery.status, delivery.stage))
+    db.commit()
+    return delivery
+
+
+def move(db, delivery, stage):
+    record_stage_changes(db, {delivery.id: stage})
+    delivery.stage = stage
+    db.commit()
+
+
+def test_price_change_leaves_no_residual_revenue(db):
+    product = models.Product(name="Tangui 1.5L", price=100, category="Bottles")
+    db.add(product)
+    db.commit()
+    delivery = order(db, product)
+    assert delivery.unit_price == 100
+
+    move(db, delivery, "delivered")
+    product.price = 250
+    db.commit()
+    move(db, delivery, "out_for_delivery")
+    move(db, delivery, "delivered")
+
+    incremental = rollup_rows(db)
+    rebuild_delivery_stats(db)
+    rebuild_monthly_sales(db)
+    assert incremental == rollup_rows(db)
+    assert dashboard_summary(db)["total_revenue"] == 200
+
+
+def test_emptied_buckets_are_dropped(db):
+    product = models.Product(name="Supermont 5L", price=900, category="Gallons")
+    db.add(product)
+    db.commit()
+    delivery = order(db, product)
+    move(db, delivery, "preparing")
+    move(db, delivery, "delivered")
+
+    daily, sales = rollup_rows(db)
+    assert [(row.stage.value, row.deliveries) for row in daily] == [("delivered", 1)]
+    summary = dashboard_summary(db)
+    assert summary["delivery_stage_distribution"] == {"delivered": 1}
+
+    record_delivery_change(db, delivery, old=(delivery.status, delivery.stage))
+    db.delete(delivery)
+    db.commit()
+    assert rollup_rows(db) == ([], [])
@@ -0,0 +1,56 @@
+from time import monotonic
+
+import numpy as np
+import pytest
+
+from app.routing import (haversine_matrix, nearest_neighbour_tour, optimize_route, or_opt, solve_path,
+                         tour_length, two_opt)
+
+YAOUNDE = (3.8480, 11.5021)
+
+
+def random_coords(n, seed):
+    rng = np.random.default_rng(seed)
+    return [YAOUNDE] + [(YAOUNDE[0] + dlat, YAOUNDE[1] + dlng)
+                        for dlat, dlng in rng.normal(0, 0.03, size=(n, 2))]
+
+
+@pytest.mark.parametrize("n, seed", [(5, 1), (20, 2), (60, 3), (150, 4)])
+def test_solve_path_is_a_permutation_no_longer_than_nearest_neighbour(n, seed):
+    coords = random_coords(n, seed)
+    dist = haversine_matrix(coords)
+
+    order = solve_path(coords, time_budget=2.0)
+
+    assert sorted(order.tolist()) == list(range(1, n + 1))
+    baseline = tour_length(nearest_neighbour_tour(dist), dist)
+    assert tour_length(np.concatenate([[0], order]), dist) <= baseline + 1e-9
+
+
+@pytest.mark.parametrize("improve", [two_opt, or_opt])
+def test_local_search_keeps_the_depot_and_never_lengthens_the_tour(improve):
+    coords = random_coords(40, 7)
+    dist = haversine_matrix(coords)
+    start = nearest_neighbour_tour(dist)
+
+    tour = improve(start, dist, monotonic() + 2.0)
+
+    assert tour[0] == 0
+    assert sorted(tour.tolist()) == list(range(len(coords)))
+    assert tour_length(tour, dist) <= tour_length(start, dist) + 1e-9
+
+
+def test_two_opt_untangles_a_crossing():
+    # Depot, then four points on a line visited out of order: 0 -> 1 -> 3 -> 2 -> 4 crosses itself
+    coords = [(0.0, 0.0), (0.0, 0.01), (0.0, 0.02), (0.0, 0.03), (0.0, 0.04)]
+    dist = haversine_matrix(coords)
+
+    tour = two_opt(np.array([0, 1, 3, 2, 4]), dist, monotonic() + 1.0)
+
+    assert tour.tolist() == [0, 1, 2, 3, 4]
+
+
+def test_small_inputs():
+    assert solve_path([YAOUNDE], time_budget=0.1).tolist() == []
+    assert solve_path([YAOUNDE, (3.85, 11.51)], time_budget=0.1).tolist() == [1]
+    assert optimize_route([]) == []